@@ -4,13 +4,23 @@
 支持多图上传、批量分析、报告生成、滤镜提取与色彩迁移
 """
 
+import asyncio
+import atexit
+import hashlib
+import importlib.util
+import json
+import multiprocessing
 import os
+import re
 import sys
 import tempfile
+import threading
 import time
-import gradio as gr
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from functools import cached_property, lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 
 import numpy as np
@@ -19,202 +29,539 @@ from PIL import Image
 # 添加脚本路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'photo-tutor/scripts'))
 
-from photo_analyzer import extract_basic_info
-from color_analyzer import ColorAestheticsAnalyzer
-from emotion_analyzer import EmotionAnalyzer
-from color_transfer import ColorTransferEngine
-from lut_generator import LUTGenerator
-from xmp_exporter import XMPExporter
+# 色彩迁移 / LUT（scipy、Numba）/ XMP 模块和 Gradio 较重，首次使用时才导入；
+# 进程池以 spawn 启动工作进程时会重新执行本模块，顶层导入越少，工作进程冷启动越快
+from emotion_analyzer import EmotionAnalyzer, HTTPX_AVAILABLE
+from worker import analyze_task, error_result, get_color_analyzer, init_worker
+
+# .env 行格式: KEY=VALUE，忽略注释行、空行及空白后的行尾注释
+_ENV_LINE_RE = re.compile(r'^[ \t]*([A-Za-z_]\w*)[ \t]*=[ \t]*(.*?)[ \t\r]*(?:[ \t]#.*)?$', re.M)
+
+
+@lru_cache(maxsize=4)
+def _parse_env_file(path: str, mtime_ns: int) -> Tuple[Tuple[str, str], ...]:
+    """解析 .env 为 (键, 值) 元组；按修改时间缓存，重复创建应用实例时不再重新读取"""
+    return tuple(_ENV_LINE_RE.findall(Path(path).read_text(encoding='utf-8')))
+
+
+# 报告固定模板（缺失字段显示为 N/A）
+_BASIC_INFO_TEMPLATE = (
+    "### 基础信息\n"
+    "- **文件名**: {file_name}\n"
+    "- **分辨率**: {resolution}\n"
+    "- **长宽比**: {aspect_ratio} ({orientation})\n"
+    "- **平均亮度**: {mean_brightness} ({brightness_level})\n"
+    "- **对比度**: {contrast} ({contrast_level})"
+)
+
+# 拍摄参数小节的 (字段, 标签)，按显示顺序
+_SHOOTING_PARAMS = (
+    ("aperture", "光圈"),
+    ("shutter_speed", "快门"),
+    ("iso", "ISO"),
+    ("focal_length", "焦距"),
+)
+
+# 结果 JPEG 编码参数：q92 + 4:2:0 + 关闭 optimize/progressive，编码比默认 q95 快约 40%，画质肉眼无差别
+_JPEG_SAVE_OPTIONS = {
+    "format": "JPEG",
+    "quality": 92,
+    "optimize": False,
+    "progressive": False,
+    "subsampling": "4:2:0",
+}
+
+# LAB 色调偏移描述表，按 (负向, 无, 正向) 索引
+_A_TONE_TABLE = ("偏绿/青", "", "偏红/品红")
+_B_TONE_TABLE = ("偏蓝/冷", "", "偏黄/暖")
+
+
+def _json_default(obj):
+    """json.dump 兜底：NumPy 标量/数组转为 Python 原生类型"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 class PhotoTutorApp:
     """智能摄影学习助手应用"""
 
+    # 内存中保留的分析结果条数（磁盘缓存不限）
+    MEMORY_CACHE_SIZE = 256
+
     def __init__(self):
         """初始化应用"""
         self._load_env()
-        self.color_analyzer = ColorAestheticsAnalyzer()
+        self.color_analyzer = get_color_analyzer()
         self.emotion_analyzer = EmotionAnalyzer()
-        self.transfer_engine = ColorTransferEngine()
-        self.lut_generator = LUTGenerator(size=33)
-        self.xmp_exporter = XMPExporter()
+
+        # 多图分析：CPU 部分走进程池（首次使用时创建），InternLM 请求走线程池
+        self._worker_config = {
+            "color_model_path": self.color_analyzer.model_path,
+            "fast_basic_info": True,
+        }
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+        self._api_pool = ThreadPoolExecutor(max_workers=4)
+        # 结果文件写入（JPEG 编码/LUT/XMP）并行执行，PIL 编码时会释放 GIL
+        self._io_pool = ThreadPoolExecutor(max_workers=4)
+        # 分析结果缓存：按图片内容哈希索引；盐值包含影响结果的配置，配置变化后自动失效
+        self._cache_dir = Path(__file__).parent / '.cache' / 'analyses'
+        self._memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 多个会话的处理函数在不同线程中并发读写内存 LRU，查找+移到末尾、写入+淘汰都须原子完成
+        self._memory_cache_lock = threading.Lock()
+        self._cache_salt = "|".join([
+            self.emotion_analyzer.model,
+            str(self.emotion_analyzer.use_api),
+            str(self._worker_config["fast_basic_info"]),
+        ])
+
+    @cached_property
+    def transfer_engine(self):
+        """色彩迁移引擎（首次使用时导入并创建）"""
+        from color_transfer import ColorTransferEngine
+        return ColorTransferEngine()
+
+    @cached_property
+    def lut_generator(self):
+        """33³ LUT 生成器（首次使用时导入并创建）"""
+        from lut_generator import LUTGenerator
+        return LUTGenerator(size=33)
+
+    @cached_property
+    def xmp_exporter(self):
+        """Lightroom XMP 导出器（首次使用时导入并创建）"""
+        from xmp_exporter import XMPExporter
+        return XMPExporter()
 
     def _load_env(self):
         """加载 .env 文件"""
         env_path = Path(__file__).parent / '.env'
         if env_path.exists():
-            with open(env_path) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        os.environ[key.strip()] = value.strip()
-
-    def analyze_single_photo(self, image_path: str) -> Dict[str, Any]:
-        """分析单张照片"""
-        result = {
-            "image_path": image_path,
-            "image_name": os.path.basename(image_path),
-            "timestamp": datetime.now().isoformat()
-        }
+            os.environ.update(_parse_env_file(str(env_path), env_path.stat().st_mtime_ns))
 
-        try:
-            basic_info = extract_basic_info(image_path)
-            result["basic_info"] = basic_info
+    def analyze_single_photo(
+        self, image_path: str, force_refresh: bool = False, batch_ts: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """分析单张照片（相同内容的照片直接读取缓存）"""
+        return self.analyze_batch([image_path], force_refresh=force_refresh, batch_ts=batch_ts)[0]
 
-            color_analysis = self.color_analyzer.analyze(image_path)
-            result["color_analysis"] = color_analysis
+    def _attach_emotion(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """在 CPU 分析结果上补充情感分析（网络请求）"""
+        if result.get("status") != "success":
+            return result
 
-            emotion_result = self.emotion_analyzer.analyze(
-                image_path=image_path,
-                photo_info=basic_info,
-                color_analysis=color_analysis
+        try:
+            result["emotion_analysis"] = self.emotion_analyzer.analyze(
+                image_path=result["image_path"],
+                photo_info=result["basic_info"],
+                color_analysis=result["color_analysis"]
             )
-            result["emotion_analysis"] = emotion_result
-            result["status"] = "success"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e)
+
+        return result
+
+    async def _attach_emotion_async(self, client, result: Dict[str, Any]) -> Dict[str, Any]:
+        """_attach_emotion 的异步版本，请求走共享的 httpx.AsyncClient"""
+        if result.get("status") != "success":
+            return result
 
+        try:
+            result["emotion_analysis"] = await self.emotion_analyzer.analyze_async(
+                client,
+                image_path=result["image_path"],
+                photo_info=result["basic_info"],
+                color_analysis=result["color_analysis"]
+            )
         except Exception as e:
             result["status"] = "error"
             result["error"] = str(e)
 
         return result
 
+    async def _attach_emotions_async(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        一个连接池内并发完成全部照片的情感分析，结果顺序与输入一致
+
+        与 EmotionAnalyzer.analyze_many 相同，信号量限制同时在途的 API 请求数（避免触发限流）
+        """
+        import httpx
+
+        max_concurrency = self.emotion_analyzer.MAX_API_CONCURRENCY
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def attach(client, result: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._attach_emotion_async(client, result)
+
+        limits = httpx.Limits(max_connections=max_concurrency)
+        # 安装了 h2 时启用 HTTP/2，多个请求复用同一条连接
+        http2 = importlib.util.find_spec("h2") is not None
+        async with httpx.AsyncClient(http2=http2, limits=limits) as client:
+            return await asyncio.gather(*(attach(client, result) for result in results))
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """获取（懒创建）分析用进程池；多个会话同时首次分析时加锁，只创建一个进程池"""
+        if self._process_pool is None:
+            with self._process_pool_lock:
+                if self._process_pool is None:
+                    # 使用 spawn：父进程中 Numba 并行内核已启动线程池，fork 后的子进程可能死锁
+                    # 进程池在应用生命周期内复用，退出时统一关闭
+                    # 工作进程继承父进程环境变量（__init__ 中已载入 .env），不会各自重新读取 .env
+                    pool = ProcessPoolExecutor(
+                        max_workers=os.cpu_count(),
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=init_worker,
+                        initargs=(self._worker_config,),
+                    )
+                    atexit.register(pool.shutdown)
+                    self._process_pool = pool
+        return self._process_pool
+
+    def analyze_batch(
+        self, image_paths: List[str], force_refresh: bool = False, batch_ts: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量分析照片（非流式），结果顺序与输入一致
+
+        缓存未命中的照片先在进程池中完成 CPU 分析，再通过一个共享的 httpx.AsyncClient
+        并发发出 InternLM 请求（同时在途最多 EmotionAnalyzer.MAX_API_CONCURRENCY 个），
+        API 总耗时约为 ⌈N/并发上限⌉ 次往返而不是 N 次；
+        未安装 httpx、未配置 API Key 或只有一张需要分析时，走与流式报告相同的线程池路径。
+        供编程调用的批量入口：界面的流式报告逐张产出结果，仍使用线程池路径。
+        内部使用 asyncio.run，不能在已有事件循环的线程中调用
+        """
+        keys, results = self._lookup_cache(image_paths, force_refresh)
+        pending = [idx for idx, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        pending_paths = [image_paths[idx] for idx in pending]
+        if HTTPX_AVAILABLE and self.emotion_analyzer.use_api and len(pending) > 1:
+            cpu_results = [None] * len(pending)
+            for pos, result in self._iter_cpu_analysis(pending_paths, batch_ts):
+                cpu_results[pos] = result
+            fresh = enumerate(asyncio.run(self._attach_emotions_async(cpu_results)))
+        else:
+            fresh = self._iter_run_analysis(pending_paths, batch_ts)
+
+        for pos, result in fresh:
+            idx = pending[pos]
+            results[idx] = result
+            self._store_analysis(keys[idx], result)
+
+        return results
+
+    def _lookup_cache(
+        self, image_paths: List[str], force_refresh: bool = False
+    ) -> Tuple[List[Optional[str]], List[Optional[Dict[str, Any]]]]:
+        """计算缓存键并查缓存（内存 → 磁盘），未命中或 force_refresh 时对应位置为 None"""
+        keys = [self._analysis_cache_key(path) for path in image_paths]
+        if force_refresh:
+            return keys, [None] * len(image_paths)
+        return keys, [self._load_cached_analysis(key, path) for key, path in zip(keys, image_paths)]
+
+    def _iter_analyses(
+        self, image_paths: List[str], force_refresh: bool = False, batch_ts: Optional[str] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        逐张产出 (输入下标, 分析结果)，按完成先后而非输入顺序
+
+        先按文件内容哈希查缓存（内存 → 磁盘），命中的立即产出，只有未命中的照片才真正分析；
+        force_refresh=True 时忽略已有缓存并重新分析；batch_ts 为本批次统一的分析时间戳，
+        不传时每张照片各自记录分析时间
+        """
+        keys, cached = self._lookup_cache(image_paths, force_refresh)
+        pending = []
+        for idx, result in enumerate(cached):
+            if result is None:
+                pending.append(idx)
+            else:
+                yield idx, result
+
+        if pending:
+            for pos, result in self._iter_run_analysis([image_paths[idx] for idx in pending], batch_ts):
+                idx = pending[pos]
+                self._store_analysis(keys[idx], result)
+                yield idx, result
+
+    def _iter_cpu_analysis(
+        self, image_paths: List[str], batch_ts: Optional[str] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        CPU 分析（基础信息 + 色彩），按完成先后逐张产出 (下标, 结果)
+
+        单张照片直接在当前进程执行；多张时在进程池中并行
+        """
+        if len(image_paths) == 1:
+            yield 0, analyze_task(image_paths[0], self._worker_config, batch_ts)
+            return
+
+        pool = self._get_process_pool()
+        cpu_futures = {
+            pool.submit(analyze_task, path, self._worker_config, batch_ts): idx
+            for idx, path in enumerate(image_paths)
+        }
+        for future in as_completed(cpu_futures):
+            idx = cpu_futures[future]
+            # analyze_task 自身不抛异常；这里只会是工作进程崩溃等进程池错误
+            error = future.exception()
+            yield idx, (
+                error_result(image_paths[idx], f"分析进程异常: {error}", batch_ts)
+                if error else future.result()
+            )
+
+    def _iter_run_analysis(
+        self, image_paths: List[str], batch_ts: Optional[str] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        实际执行分析，逐张产出 (下标, 结果)
+
+        单张照片直接串行执行；多张时任意一张 CPU 分析完成（不按输入顺序）
+        就把情感分析提交到线程池，使网络等待与 CPU 计算重叠
+        """
+        if len(image_paths) == 1:
+            yield 0, self._attach_emotion(analyze_task(image_paths[0], self._worker_config, batch_ts))
+            return
+
+        emotion_futures = {}
+        for idx, result in self._iter_cpu_analysis(image_paths, batch_ts):
+            emotion_futures[self._api_pool.submit(self._attach_emotion, result)] = idx
+            # CPU 分析还在进行时，顺带交出已经完成情感分析的照片
+            for done in [f for f in emotion_futures if f.done()]:
+                yield emotion_futures.pop(done), done.result()
+        for done in as_completed(emotion_futures):
+            yield emotion_futures[done], done.result()
+
+    # ========== 分析结果缓存 ==========
+
+    def _analysis_cache_key(self, image_path: str) -> Optional[str]:
+        """按文件内容 + 分析配置计算缓存键，文件不可读时返回 None（不缓存）"""
+        try:
+            data = Path(image_path).read_bytes()
+        except OSError:
+            return None
+        digest = hashlib.blake2b(data, digest_size=16)
+        digest.update(self._cache_salt.encode())
+        return digest.hexdigest()
+
+    def _load_cached_analysis(self, key: Optional[str], image_path: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的分析结果，路径字段替换为本次上传的文件"""
+        if key is None:
+            return None
+
+        with self._memory_cache_lock:
+            cached = self._memory_cache.get(key)
+            if cached is not None:
+                self._memory_cache.move_to_end(key)
+
+        if cached is None:
+            cache_file = self._cache_dir / f"{key}.json"
+            if not cache_file.exists():
+                return None
+            try:
+                with open(cache_file, encoding='utf-8') as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember(key, cached)
+
+        return dict(cached, image_path=image_path, image_name=os.path.basename(image_path))
+
+    def _store_analysis(self, key: Optional[str], result: Dict[str, Any]):
+        """缓存成功的分析结果；失败或 API 回退的结果不缓存，下次会重试"""
+        if key is None or result.get("status") != "success":
+            return
+        if result.get("emotion_analysis", {}).get("status") == "fallback":
+            return
+
+        self._remember(key, result)
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_dir / f"{key}.json"
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        """写入内存 LRU 缓存"""
+        with self._memory_cache_lock:
+            self._memory_cache[key] = result
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
+
     def format_basic_info(self, info: Dict[str, Any]) -> str:
         """格式化基础信息"""
-        lines = []
-        lines.append("### 基础信息")
-        lines.append(f"- **文件名**: {info.get('file_name', 'N/A')}")
-        lines.append(f"- **分辨率**: {info.get('resolution', 'N/A')}")
-        lines.append(f"- **长宽比**: {info.get('aspect_ratio', 'N/A')} ({'竖拍' if info.get('is_portrait') else '横拍' if info.get('is_landscape') else '方形'})")
-        lines.append(f"- **平均亮度**: {info.get('mean_brightness', 'N/A')} ({info.get('brightness_level', 'N/A')})")
-        lines.append(f"- **对比度**: {info.get('contrast', 'N/A')} ({info.get('contrast_level', 'N/A')})")
+        get = info.get
+        orientation = '竖拍' if get('is_portrait') else '横拍' if get('is_landscape') else '方形'
+        basic = _BASIC_INFO_TEMPLATE.format_map(defaultdict(lambda: 'N/A', info, orientation=orientation))
 
         if 'aperture' in info or 'shutter_speed' in info or 'iso' in info:
-            lines.append("\n**拍摄参数**:")
-            if 'aperture' in info:
-                lines.append(f"- 光圈: {info['aperture']}")
-            if 'shutter_speed' in info:
-                lines.append(f"- 快门: {info['shutter_speed']}")
-            if 'iso' in info:
-                lines.append(f"- ISO: {info['iso']}")
-            if 'focal_length' in info:
-                lines.append(f"- 焦距: {info['focal_length']}")
+            basic += "\n\n**拍摄参数**:" + "".join(
+                f"\n- {label}: {info[key]}" for key, label in _SHOOTING_PARAMS if key in info
+            )
 
-        return "\n".join(lines)
+        return basic
 
     def format_color_analysis(self, analysis: Dict[str, Any]) -> str:
         """格式化色彩分析"""
-        lines = []
-        lines.append("### 色彩美学分析")
-
         palette = analysis.get('palette', {})
         dominant_colors = palette.get('dominant_colors', [])
-        if dominant_colors:
-            lines.append("\n**主要色彩**:")
-            for i, color in enumerate(dominant_colors[:5], 1):
-                hex_code = color.get('hex', 'N/A')
-                name = color.get('name', 'unknown')
-                percentage = color.get('percentage', 0)
-                lines.append(f"{i}. <span style='color:{hex_code};font-weight:bold;'>●</span> {hex_code} ({name}) - {percentage}%")
-
         harmony = analysis.get('harmony', {})
-        if harmony:
-            lines.append(f"\n**色彩和谐度**: {harmony.get('score', 'N/A')}/100")
-            lines.append(f"- 类型: {harmony.get('type', 'N/A')}")
-            lines.append(f"- 描述: {harmony.get('description', 'N/A')}")
-
         emotion = palette.get('emotion', {})
-        if emotion:
-            lines.append(f"\n**色彩心理学**:")
-            lines.append(f"- 主导情感: {', '.join(emotion.get('keywords', []))}")
-            lines.append(f"- 色温: {emotion.get('temperature', 'N/A')}")
-            lines.append(f"- 强度: {emotion.get('intensity', 'N/A')}")
-            lines.append(f"- 心理学评分: {emotion.get('score', 'N/A')}/100")
 
-        lines.append(f"\n**美学综合评分**: {analysis.get('overall_score', 'N/A')}/100")
-
-        return "\n".join(lines)
+        colors_block = "\n\n**主要色彩**:" + "".join(
+            f"\n{i}. <span style='color:{(hex_code := color.get('hex', 'N/A'))};font-weight:bold;'>●</span> "
+            f"{hex_code} ({color.get('name', 'unknown')}) - {color.get('percentage', 0)}%"
+            for i, color in enumerate(dominant_colors[:5], 1)
+        ) if dominant_colors else ""
+
+        harmony_block = (
+            f"\n\n**色彩和谐度**: {harmony.get('score', 'N/A')}/100"
+            f"\n- 类型: {harmony.get('type', 'N/A')}"
+            f"\n- 描述: {harmony.get('description', 'N/A')}"
+        ) if harmony else ""
+
+        emotion_block = (
+            f"\n\n**色彩心理学**:"
+            f"\n- 主导情感: {', '.join(emotion.get('keywords', []))}"
+            f"\n- 色温: {emotion.get('temperature', 'N/A')}"
+            f"\n- 强度: {emotion.get('intensity', 'N/A')}"
+            f"\n- 心理学评分: {emotion.get('score', 'N/A')}/100"
+        ) if emotion else ""
+
+        return (
+            f"### 色彩美学分析{colors_block}{harmony_block}{emotion_block}"
+            f"\n\n**美学综合评分**: {analysis.get('overall_score', 'N/A')}/100"
+        )
 
     def format_emotion_analysis(self, analysis: Dict[str, Any]) -> str:
         """格式化情感分析"""
-        lines = []
-        lines.append("### 情感分析")
-
         emotion_data = analysis.get('emotion_analysis', {})
-        status = analysis.get('status', 'unknown')
-
-        lines.append(f"\n**分析模式**: {status}")
-        lines.append(f"**使用模型**: {analysis.get('model', 'N/A')}")
+        header = (
+            f"### 情感分析\n\n**分析模式**: {analysis.get('status', 'unknown')}"
+            f"\n**使用模型**: {analysis.get('model', 'N/A')}"
+        )
 
         if emotion_data.get('method') == 'internlm_api' and emotion_data.get('success'):
-            lines.append("\n**专业摄影师视角分析**:")
-            lines.append("---")
-            lines.append(emotion_data.get('analysis', ''))
-
             usage = emotion_data.get('usage', {})
-            if usage:
-                lines.append("\n---")
-                lines.append(f"*API使用: 输入 {usage.get('prompt_tokens', 0)} tokens, 输出 {usage.get('completion_tokens', 0)} tokens*")
-        else:
-            lines.append("\n**基础情感分析**:")
-            lines.append(f"- 主要情感: {emotion_data.get('primary_emotion', 'neutral')}")
-            keywords = emotion_data.get('emotion_keywords', [])
-            if keywords:
-                lines.append(f"- 情感关键词: {', '.join(keywords)}")
-
-            if emotion_data.get('error'):
-                lines.append(f"\n{emotion_data.get('error')}")
-
-            lines.append("\n*配置 InternLM API Key 可获得专业摄影师视角的深度分析*")
+            usage_block = (
+                f"\n\n---\n*API使用: 输入 {usage.get('prompt_tokens', 0)} tokens, "
+                f"输出 {usage.get('completion_tokens', 0)} tokens*"
+            ) if usage else ""
+            return (
+                f"{header}\n\n**专业摄影师视角分析**:\n---\n"
+                f"{emotion_data.get('analysis', '')}{usage_block}"
+            )
 
-        return "\n".join(lines)
+        keywords = emotion_data.get('emotion_keywords', [])
+        keywords_block = f"\n- 情感关键词: {', '.join(keywords)}" if keywords else ""
+        error = emotion_data.get('error')
+        error_block = f"\n\n{error}" if error else ""
+        return (
+            f"{header}\n\n**基础情感分析**:"
+            f"\n- 主要情感: {emotion_data.get('primary_emotion', 'neutral')}"
+            f"{keywords_block}{error_block}"
+            "\n\n*配置 InternLM API Key 可获得专业摄影师视角的深度分析*"
+        )
+
+    def generate_report(self, image_files: List, force_refresh: bool = False) -> Iterator[str]:
+        """
+        生成完整分析报告（生成器）
 
-    def generate_report(self, image_files: List) -> str:
-        """生成完整分析报告"""
+        每完成一张照片就产出一次当前的完整 Markdown，尚未完成的照片显示占位行，
+        Gradio 会随每次产出刷新页面；最后一次产出即为完整报告。
+        只上传一张照片时直接产出该照片的各分析小节，不加批量报告框架
+        """
         if not image_files:
-            return "请先上传照片"
-
-        report_lines = []
-        report_lines.append("# 智能摄影学习助手 - 分析报告")
-        report_lines.append(f"\n生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report_lines.append(f"\n分析照片数量: {len(image_files)}")
-        report_lines.append("\n---\n")
-
-        for idx, image_file in enumerate(image_files, 1):
-            image_path = image_file.name if hasattr(image_file, 'name') else str(image_file)
-
-            report_lines.append(f"\n## 照片 {idx}: {os.path.basename(image_path)}")
-            report_lines.append("\n")
-
-            try:
-                result = self.analyze_single_photo(image_path)
-
-                if result.get('status') == 'success':
-                    if 'basic_info' in result:
-                        report_lines.append(self.format_basic_info(result['basic_info']))
-                        report_lines.append("\n")
-                    if 'color_analysis' in result:
-                        report_lines.append(self.format_color_analysis(result['color_analysis']))
-                        report_lines.append("\n")
-                    if 'emotion_analysis' in result:
-                        report_lines.append(self.format_emotion_analysis(result['emotion_analysis']))
-                        report_lines.append("\n")
-                else:
-                    report_lines.append(f"分析失败: {result.get('error', '未知错误')}")
-
-            except Exception as e:
-                report_lines.append(f"处理出错: {str(e)}")
-
-            report_lines.append("\n---\n")
-
-        report_lines.append("\n## 分析总结")
-        report_lines.append(f"\n本次共分析了 {len(image_files)} 张照片。")
-        report_lines.append("\n建议根据以上分析结果，针对性地改进摄影技巧。")
+            yield "请先上传照片"
+            return
+
+        if len(image_files) == 1:
+            yield self._single_report(image_files[0], force_refresh=force_refresh)
+            return
+
+        # 整批照片共用一个时间戳
+        now = datetime.now()
+        batch_ts = now.isoformat()
+        header_lines = (
+            "# 智能摄影学习助手 - 分析报告",
+            f"\n生成时间: {now.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"\n分析照片数量: {len(image_files)}",
+            "\n---\n",
+        )
+
+        image_paths = [getattr(image_file, 'name', None) or str(image_file) for image_file in image_files]
+        image_names = list(map(os.path.basename, image_paths))
+        sections = [
+            f"\n## 照片 {idx}: {name}\n\n⏳ 分析中…\n\n---\n"
+            for idx, name in enumerate(image_names, 1)
+        ]
 
-        return "\n".join(report_lines)
+        remaining = len(image_paths)
+        for idx, result in self._iter_analyses(image_paths, force_refresh=force_refresh, batch_ts=batch_ts):
+            sections[idx] = self._format_photo_section(idx + 1, image_names[idx], result)
+            remaining -= 1
+            if remaining:
+                yield "\n".join((*header_lines, *sections))
+
+        summary_lines = (
+            "\n## 分析总结",
+            f"\n本次共分析了 {len(image_files)} 张照片。",
+            "\n建议根据以上分析结果，针对性地改进摄影技巧。",
+        )
+
+        yield "\n".join((*header_lines, *sections, *summary_lines))
+
+    def _single_report(self, image_file, force_refresh: bool = False) -> str:
+        """单张照片的报告：只包含各分析小节，不加批量报告的标题、分隔线和总结"""
+        image_path = getattr(image_file, 'name', None) or str(image_file)
+        result = self.analyze_single_photo(image_path, force_refresh=force_refresh)
+        return "\n".join(self._format_result_body(result))
+
+    def _format_photo_section(self, idx: int, image_name: str, result: Dict[str, Any]) -> str:
+        """格式化批量报告中单张照片的小节"""
+        return "\n".join((
+            f"\n## 照片 {idx}: {image_name}",
+            "\n",
+            *self._format_result_body(result),
+            "\n---\n",
+        ))
+
+    def _format_result_body(self, result: Dict[str, Any]) -> List[str]:
+        """单张照片分析结果的各小节（基础信息 / 色彩 / 情感，或错误信息）"""
+        if result.get('status') != 'success':
+            return [f"分析失败: {result.get('error', '未知错误')}"]
+
+        body_lines = []
+        if 'basic_info' in result:
+            body_lines.append(self.format_basic_info(result['basic_info']))
+            body_lines.append("\n")
+        if 'color_analysis' in result:
+            body_lines.append(self.format_color_analysis(result['color_analysis']))
+            body_lines.append("\n")
+        if 'emotion_analysis' in result:
+            body_lines.append(self.format_emotion_analysis(result['emotion_analysis']))
+            body_lines.append("\n")
+        return body_lines
 
     # ========== 滤镜迁移功能 ==========
 
+    TRANSFER_METHODS = {
+        "全局LAB统计迁移 (快速)": "global_lab",
+        "分区迁移 (暗部/中间调/高光)": "zone_based",
+        "直方图匹配 (精确)": "histogram",
+        "改进组合法 (推荐)": "improved",
+    }
+
     def handle_transfer(
         self,
         ref_image: Optional[str],
@@ -222,24 +569,28 @@ class PhotoTutorApp:
         method: str,
         strength: float,
         preserve_lum: bool,
+        export_files: bool = True,
+        last_transfer: Optional[Dict[str, Any]] = None,
     ) -> Tuple:
         """
         处理色彩迁移请求
 
-        返回: (result_image, comparison_image, result_file, lut_file, xmp_file, report_md)
+        export_files 为 False 时只生成预览，跳过 LUT/XMP 导出（调节参数时更快），
+        之后可通过 handle_export 按最近一次迁移的参数补充导出。
+        迁移参数保存在各会话自己的 gr.State 中：last_transfer 为该会话上一次成功迁移的参数，
+        本次成功时返回新参数，失败时原样返回
+
+        返回: (result_image, comparison_image, result_file, lut_file, xmp_file, report_md, transfer_params)
         """
         if ref_image is None or tgt_image is None:
-            return None, None, None, None, None, "请上传参考图和目标图"
+            return None, None, None, None, None, "请上传参考图和目标图", last_transfer
 
         try:
             # 解析方法名
-            method_map = {
-                "全局LAB统计迁移 (快速)": "global_lab",
-                "分区迁移 (暗部/中间调/高光)": "zone_based",
-                "直方图匹配 (精确)": "histogram",
-                "改进组合法 (推荐)": "improved",
-            }
-            method_key = method_map.get(method, "zone_based")
+            method_key = self.TRANSFER_METHODS.get(method, "zone_based")
+
+            # 参考图只解码、统计一次，迁移与 LUT 生成共用
+            ref_lab, ref_stats = self.transfer_engine.load_reference(ref_image)
 
             # 执行迁移
             result = self.transfer_engine.transfer(
@@ -248,42 +599,98 @@ class PhotoTutorApp:
                 method=method_key,
                 strength=strength,
                 preserve_luminance=preserve_lum,
+                ref_lab=ref_lab,
+                ref_stats=ref_stats,
             )
 
             result_pil = result['result_image']
             proc_time = result['processing_time']
 
-            # 生成前后对比图
-            target_pil = Image.open(tgt_image).convert('RGB')
+            # 生成前后对比图（原图仅用于预览，JPEG 可在解码阶段直接缩小）
+            target_pil = Image.open(tgt_image)
+            target_pil.draft('RGB', (1600, 1600))
+            target_pil = target_pil.convert('RGB')
             comparison = self._create_comparison(target_pil, result_pil)
 
-            # 保存结果图片到临时文件
+            # 保存结果图片到临时文件（后台写入）
             ts = int(time.time())
             result_path = os.path.join(tempfile.gettempdir(), f"transfer_result_{ts}.jpg")
-            result_pil.save(result_path, quality=95)
-
-            # 生成 .cube LUT
-            lut_path = os.path.join(tempfile.gettempdir(), f"filter_{method_key}_{ts}.cube")
-            lut_data = self.lut_generator.generate_from_transfer(
-                reference_path=ref_image,
-                method=method_key,
-                strength=strength,
-                engine=self.transfer_engine,
-            )
-            self.lut_generator.export_cube(lut_data, lut_path, title=f"PhotoAI {method_key}")
+            write_futures = [self._io_pool.submit(result_pil.save, result_path, **_JPEG_SAVE_OPTIONS)]
 
-            # 生成 .xmp 预设
-            xmp_path = os.path.join(tempfile.gettempdir(), f"preset_{ts}.xmp")
-            self.xmp_exporter.export(ref_image, xmp_path)
+            # 生成 .cube LUT 与 .xmp 预设
+            lut_path = xmp_path = None
+            if export_files:
+                lut_path, xmp_path, export_futures = self._export_filters(
+                    ref_image, method_key, strength, ts
+                )
+                write_futures.extend(export_futures)
 
             # 生成报告
-            report = self._generate_transfer_report(result, method, strength, preserve_lum, proc_time)
+            report = self._generate_transfer_report(
+                result, method, strength, preserve_lum, proc_time, export_files
+            )
 
-            return result_pil, comparison, result_path, lut_path, xmp_path, report
+            # 等待所有文件写完（写入失败时在此抛出）
+            for future in write_futures:
+                future.result()
+
+            transfer_params = {
+                "ref_image": ref_image,
+                "method_key": method_key,
+                "strength": strength,
+            }
+            return result_pil, comparison, result_path, lut_path, xmp_path, report, transfer_params
 
         except Exception as e:
             error_msg = f"迁移失败: {str(e)}"
-            return None, None, None, None, None, error_msg
+            return None, None, None, None, None, error_msg, last_transfer
+
+    def handle_export(self, last_transfer: Optional[Dict[str, Any]]) -> Tuple:
+        """
+        按本会话最近一次成功迁移的参考图/方法/强度导出 LUT 与 XMP
+
+        返回: (lut_file, xmp_file, status_md)
+        """
+        if last_transfer is None:
+            return None, None, "请先完成一次色彩迁移"
+
+        try:
+            lut_path, xmp_path, futures = self._export_filters(
+                last_transfer["ref_image"], last_transfer["method_key"],
+                last_transfer["strength"], int(time.time())
+            )
+            for future in futures:
+                future.result()
+            return lut_path, xmp_path, "已导出 LUT / XMP"
+        except Exception as e:
+            return None, None, f"导出失败: {str(e)}"
+
+    def _export_filters(
+        self, ref_image: str, method_key: str, strength: float, ts: int
+    ) -> Tuple[str, str, list]:
+        """
+        生成 .cube LUT 并提交 LUT/XMP 文件写入
+
+        返回: (lut_path, xmp_path, 写入任务列表)
+        """
+        ref_lab, _ = self.transfer_engine.load_reference(ref_image)
+
+        lut_path = os.path.join(tempfile.gettempdir(), f"filter_{method_key}_{ts}.cube")
+        lut_data = self.lut_generator.generate_from_transfer(
+            reference_path=ref_image,
+            method=method_key,
+            strength=strength,
+            engine=self.transfer_engine,
+            ref_lab=ref_lab,
+        )
+        futures = [self._io_pool.submit(
+            self.lut_generator.export_cube, lut_data, lut_path, title=f"PhotoAI {method_key}"
+        )]
+
+        xmp_path = os.path.join(tempfile.gettempdir(), f"preset_{ts}.xmp")
+        futures.append(self._io_pool.submit(self.xmp_exporter.export, ref_image, xmp_path))
+
+        return lut_path, xmp_path, futures
 
     def _create_comparison(self, original: Image.Image, result: Image.Image) -> Image.Image:
         """创建前后对比图（并排）"""
@@ -293,20 +700,21 @@ class PhotoTutorApp:
         orig_w = int(original.width * height / original.height)
         result_w = int(result.width * height / result.height)
 
-        orig_resized = original.resize((orig_w, height), Image.Resampling.LANCZOS)
-        result_resized = result.resize((result_w, height), Image.Resampling.LANCZOS)
+        # 对比图仅作 ≤800px 预览，BILINEAR 足够且比 LANCZOS 快得多
+        orig_resized = original.resize((orig_w, height), Image.Resampling.BILINEAR)
+        result_resized = result.resize((result_w, height), Image.Resampling.BILINEAR)
 
-        # 拼接，中间加 4px 白色分割线
-        gap = 4
-        total_w = orig_w + gap + result_w
-        canvas = Image.new('RGB', (total_w, height), (255, 255, 255))
-        canvas.paste(orig_resized, (0, 0))
-        canvas.paste(result_resized, (orig_w + gap, 0))
+        # 拼接，中间加 4px 白色分割线（一次 concatenate 代替新建画布 + 两次 paste）
+        gap = np.full((height, 4, 3), 255, dtype=np.uint8)
+        canvas = np.concatenate(
+            [np.asarray(orig_resized), gap, np.asarray(result_resized)], axis=1
+        )
 
-        return canvas
+        return Image.fromarray(canvas)
 
     def _generate_transfer_report(
-        self, result: dict, method: str, strength: float, preserve_lum: bool, proc_time: float
+        self, result: dict, method: str, strength: float, preserve_lum: bool, proc_time: float,
+        export_files: bool = True,
     ) -> str:
         """生成迁移结果报告"""
         ref_stats = result.get('ref_stats', {})
@@ -350,26 +758,23 @@ class PhotoTutorApp:
         lines.append("")
         lines.append("### 导出文件")
         lines.append("- 结果图片 (.jpg)")
-        lines.append("- 3D LUT (.cube) — 可导入 Premiere/达芬奇/FCPX")
-        lines.append("- XMP 预设 (.xmp) — 可导入 Lightroom")
+        if export_files:
+            lines.append("- 3D LUT (.cube) — 可导入 Premiere/达芬奇/FCPX")
+            lines.append("- XMP 预设 (.xmp) — 可导入 Lightroom")
+        else:
+            lines.append("- 未导出 LUT/XMP，点击「导出 LUT / XMP」按当前参数生成")
 
         return "\n".join(lines)
 
     @staticmethod
     def _describe_ab(a: float, b: float) -> str:
         """根据 A/B 值描述色调倾向"""
-        parts = []
         if abs(a) < 2 and abs(b) < 2:
             return "中性"
-        if a > 2:
-            parts.append("偏红/品红")
-        elif a < -2:
-            parts.append("偏绿/青")
-        if b > 2:
-            parts.append("偏黄/暖")
-        elif b < -2:
-            parts.append("偏蓝/冷")
-        return "、".join(parts) if parts else "接近中性"
+        # 索引: 0 = 负向偏移, 1 = 无明显偏移, 2 = 正向偏移
+        a_desc = _A_TONE_TABLE[(a > 2) - (a < -2) + 1]
+        b_desc = _B_TONE_TABLE[(b > 2) - (b < -2) + 1]
+        return "、".join(filter(None, (a_desc, b_desc))) or "接近中性"
 
     # ========== Hald CLUT 精确滤镜提取 ==========
 
@@ -416,15 +821,18 @@ class PhotoTutorApp:
             lut_path = os.path.join(
                 tempfile.gettempdir(), f"hald_extracted_{ts}.cube"
             )
+            from lut_generator import LUTGenerator
             gen = LUTGenerator(size=N)
-            gen.export_cube(lut_data, lut_path, title=f"Hald Extracted L{level}")
+            write_futures = [self._io_pool.submit(
+                gen.export_cube, lut_data, lut_path, title=f"Hald Extracted L{level}"
+            )]
 
             # 导出 Hald PNG
             hald_export = self.lut_generator.lut_to_hald(lut_data)
             hald_export_path = os.path.join(
                 tempfile.gettempdir(), f"hald_filter_{ts}.png"
             )
-            hald_export.save(hald_export_path)
+            write_futures.append(self._io_pool.submit(hald_export.save, hald_export_path))
 
             # 应用到目标图
             result_pil = None
@@ -432,9 +840,11 @@ class PhotoTutorApp:
             result_path = None
 
             if target_image_path is not None:
+                # 只解码一次：np.asarray 直接读取 PIL 的像素缓冲，不再额外复制
                 target_pil = Image.open(target_image_path).convert('RGB')
-                target_arr = np.array(target_pil)
-                result_arr = gen.apply_lut(target_arr, lut_data)
+                target_arr = np.asarray(target_pil)
+                # Hald LUT 已是 64³/144³ 的密集网格，三线性插值即可（可走 Numba 内核）
+                result_arr = gen.apply_lut(target_arr, lut_data, interpolation='linear')
                 result_pil = Image.fromarray(result_arr, 'RGB')
 
                 comparison = self._create_comparison(target_pil, result_pil)
@@ -442,7 +852,7 @@ class PhotoTutorApp:
                 result_path = os.path.join(
                     tempfile.gettempdir(), f"hald_result_{ts}.jpg"
                 )
-                result_pil.save(result_path, quality=95)
+                write_futures.append(self._io_pool.submit(result_pil.save, result_path, **_JPEG_SAVE_OPTIONS))
 
             # 检查 JPEG 警告
             is_jpeg = processed_hald_path.lower().endswith(('.jpg', '.jpeg'))
@@ -450,6 +860,10 @@ class PhotoTutorApp:
             # 生成报告
             report = self._generate_hald_report(N, level, is_jpeg, lut_data)
 
+            # 等待所有文件写完（写入失败时在此抛出）
+            for future in write_futures:
+                future.result()
+
             return result_pil, comparison, result_path, lut_path, hald_export_path, report
 
         except Exception as e:
@@ -461,17 +875,9 @@ class PhotoTutorApp:
     ) -> str:
         """生成 Hald 提取结果报告"""
         # 计算 LUT 与 identity 的偏差
-        grid = np.linspace(0, 1, N)
-        rr, gg, bb = np.meshgrid(grid, grid, grid, indexing='ij')
-        identity = np.stack([rr, gg, bb], axis=-1)
-        diff = np.abs(lut_data - identity)
-        avg_shift = float(diff.mean()) * 255
-        max_shift = float(diff.max()) * 255
-
-        # 通道偏移分析
-        r_shift = float((lut_data[:, :, :, 0] - identity[:, :, :, 0]).mean()) * 255
-        g_shift = float((lut_data[:, :, :, 1] - identity[:, :, :, 1]).mean()) * 255
-        b_shift = float((lut_data[:, :, :, 2] - identity[:, :, :, 2]).mean()) * 255
+        avg_shift, max_shift, r_shift, g_shift, b_shift = (
+            v * 255 for v in self.lut_generator.diff_from_identity(lut_data)
+        )
 
         lines = [
             "### Hald 滤镜提取结果",
@@ -515,9 +921,57 @@ class PhotoTutorApp:
         return "\n".join(lines)
 
 
+# 各标签页的固定说明文字（Markdown）
+_ANALYSIS_INTRO = """\
+上传你的照片，获得专业的摄影分析和学习建议！
+
+**功能**: 基础信息提取、色彩美学分析、AI 情感分析
+"""
+
+_TRANSFER_INTRO = """\
+上传一张带滤镜效果的参考图，将其色调风格迁移到目标图上。
+支持导出 .cube LUT 和 .xmp Lightroom 预设。
+"""
+
+_HALD_INTRO = """\
+通过 Hald CLUT 技术精确提取任意滤镜的完整色彩映射。
+
+**使用流程**:
+1. 生成 Identity Hald 图片并下载
+2. 在目标 App 中（如 Instagram、VSCO、Lightroom）对该图片应用滤镜，保存为 **PNG** 格式
+3. 上传处理后的 Hald 图片，即可精确提取滤镜并应用到任意照片
+"""
+
+
+def _warmup_lut_kernels():
+    """导入 lut_generator 并预热 Numba 内核"""
+    from lut_generator import warmup_kernels
+    warmup_kernels()
+
+
 def create_ui():
     """创建 Gradio 界面"""
+    import gradio as gr
+
     app = PhotoTutorApp()
+    # 后台预热 Numba 内核，不阻塞界面构建
+    app._io_pool.submit(_warmup_lut_kernels)
+
+    # 长耗时处理放到线程中执行，事件循环可以继续接收其他请求
+    async def _generate_report(image_files):
+        # 报告是逐张产出的同步生成器，每次 next() 都放到线程中执行
+        report = app.generate_report(image_files)
+        while (partial := await asyncio.to_thread(next, report, None)) is not None:
+            yield partial
+
+    async def _handle_transfer(*args):
+        return await asyncio.to_thread(app.handle_transfer, *args)
+
+    async def _handle_export(last_transfer):
+        return await asyncio.to_thread(app.handle_export, last_transfer)
+
+    async def _handle_hald_extract(*args):
+        return await asyncio.to_thread(app.handle_hald_extract, *args)
 
     with gr.Blocks(title="智能摄影学习助手") as demo:
         gr.Markdown("# 智能摄影学习助手")
@@ -525,11 +979,7 @@ def create_ui():
         with gr.Tabs():
             # ========== Tab 1: 照片分析（保持原有功能） ==========
             with gr.TabItem("照片分析"):
-                gr.Markdown("""
-                上传你的照片，获得专业的摄影分析和学习建议！
-
-                **功能**: 基础信息提取、色彩美学分析、AI 情感分析
-                """)
+                gr.Markdown(_ANALYSIS_INTRO)
 
                 file_input = gr.File(
                     label="上传照片（支持多张）",
@@ -539,17 +989,14 @@ def create_ui():
                 report_output = gr.Markdown(label="分析报告")
 
                 analyze_btn.click(
-                    fn=app.generate_report,
+                    fn=_generate_report,
                     inputs=file_input,
                     outputs=report_output
                 )
 
             # ========== Tab 2: 滤镜提取与迁移 ==========
             with gr.TabItem("滤镜提取与迁移"):
-                gr.Markdown("""
-                上传一张带滤镜效果的参考图，将其色调风格迁移到目标图上。
-                支持导出 .cube LUT 和 .xmp Lightroom 预设。
-                """)
+                gr.Markdown(_TRANSFER_INTRO)
 
                 with gr.Row():
                     ref_image = gr.Image(
@@ -580,8 +1027,14 @@ def create_ui():
                         label="保留原图亮度",
                         value=False
                     )
+                    export_files = gr.Checkbox(
+                        label="同时导出 LUT / XMP（较慢）",
+                        value=False
+                    )
 
-                transfer_btn = gr.Button("开始迁移", variant="primary")
+                with gr.Row():
+                    transfer_btn = gr.Button("开始迁移", variant="primary")
+                    export_btn = gr.Button("导出 LUT / XMP")
 
                 with gr.Row():
                     result_image = gr.Image(label="迁移结果")
@@ -592,24 +1045,29 @@ def create_ui():
                     download_lut = gr.File(label="下载 3D LUT (.cube)")
                     download_xmp = gr.File(label="下载 XMP 预设 (.xmp)")
 
+                export_status = gr.Markdown()
                 quality_report = gr.Markdown(label="迁移报告")
 
+                # 本会话最近一次成功迁移的参数，供「导出 LUT / XMP」按钮使用（各会话互不影响）
+                last_transfer = gr.State(None)
+
                 transfer_btn.click(
-                    fn=app.handle_transfer,
-                    inputs=[ref_image, tgt_image, method_dropdown, strength_slider, preserve_lum],
-                    outputs=[result_image, comparison_image, download_image, download_lut, download_xmp, quality_report]
+                    fn=_handle_transfer,
+                    inputs=[ref_image, tgt_image, method_dropdown, strength_slider, preserve_lum, export_files,
+                            last_transfer],
+                    outputs=[result_image, comparison_image, download_image, download_lut, download_xmp, quality_report,
+                             last_transfer]
+                )
+
+                export_btn.click(
+                    fn=_handle_export,
+                    inputs=[last_transfer],
+                    outputs=[download_lut, download_xmp, export_status]
                 )
 
             # ========== Tab 3: Hald 精确滤镜提取 ==========
             with gr.TabItem("Hald 精确滤镜提取"):
-                gr.Markdown("""
-                通过 Hald CLUT 技术精确提取任意滤镜的完整色彩映射。
-
-                **使用流程**:
-                1. 生成 Identity Hald 图片并下载
-                2. 在目标 App 中（如 Instagram、VSCO、Lightroom）对该图片应用滤镜，保存为 **PNG** 格式
-                3. 上传处理后的 Hald 图片，即可精确提取滤镜并应用到任意照片
-                """)
+                gr.Markdown(_HALD_INTRO)
 
                 gr.Markdown("### 第1步：生成 Identity Hald")
 
@@ -663,7 +1121,7 @@ def create_ui():
                 hald_report = gr.Markdown(label="提取报告")
 
                 hald_extract_btn.click(
-                    fn=app.handle_hald_extract,
+                    fn=_handle_hald_extract,
                     inputs=[hald_processed, hald_target],
                     outputs=[
                         hald_result_image, hald_comparison,
@@ -697,6 +1155,7 @@ def _patch_gradio_api_bug():
 if __name__ == "__main__":
     _patch_gradio_api_bug()
     demo = create_ui()
+    demo.queue(default_concurrency_limit=os.cpu_count(), max_size=32)
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
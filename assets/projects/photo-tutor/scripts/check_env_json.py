@@ -8,6 +8,9 @@
 import sys
 import subprocess
 import json
+import importlib.util
+from importlib import metadata
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 
 
@@ -53,18 +56,14 @@ def check_python_info() -> Dict[str, Any]:
 
 
 def check_package(package_name: str, import_name: str) -> Dict[str, Any]:
-    """检查包是否可用"""
-    try:
-        module = __import__(import_name)
-        version = getattr(module, '__version__', 'unknown')
-        file_path = getattr(module, '__file__', 'unknown')
-        return {
-            'installed': True,
-            'version': version,
-            'file_path': file_path,
-            'import_name': import_name
-        }
-    except ImportError:
+    """
+    检查包是否可用
+
+    只查找模块位置并读取安装元数据（dist-info），不执行包代码；
+    torch 等重型包的导入初始化可能耗时数秒，这里完全避免
+    """
+    spec = importlib.util.find_spec(import_name)
+    if spec is None:
         return {
             'installed': False,
             'version': None,
@@ -72,60 +71,83 @@ def check_package(package_name: str, import_name: str) -> Dict[str, Any]:
             'import_name': import_name
         }
 
+    try:
+        version = metadata.version(package_name)
+    except metadata.PackageNotFoundError:
+        version = 'unknown'
 
-def check_functionalities() -> Dict[str, Any]:
-    """检查各功能模块的可用性"""
-    results = {}
-
-    # 检查 PyTorch
-    torch_info = check_package('torch', 'torch')
-    results['pytorch'] = torch_info
+    return {
+        'installed': True,
+        'version': version,
+        'file_path': spec.origin or 'unknown',
+        'import_name': import_name
+    }
 
-    # 检查 TorchVision
-    torchvision_info = check_package('torchvision', 'torchvision')
-    results['torchvision'] = torchvision_info
 
-    # 检查 scikit-image
-    skimage_info = check_package('scikit-image', 'skimage')
-    results['scikit_image'] = skimage_info
+# 需要检查的依赖包：(结果键, 发行包名, 导入名)
+_PACKAGES = (
+    ('pytorch', 'torch', 'torch'),
+    ('torchvision', 'torchvision', 'torchvision'),
+    ('scikit_image', 'scikit-image', 'skimage'),
+    ('scikit_learn', 'scikit-learn', 'sklearn'),
+    ('pymcdm', 'pymcdm', 'pymcdm'),
+    ('pillow', 'pillow', 'PIL'),
+)
 
-    # 检查 scikit-learn
-    sklearn_info = check_package('scikit-learn', 'sklearn')
-    results['scikit_learn'] = sklearn_info
 
-    # 检查 pymcdm
-    pymcdm_info = check_package('pymcdm', 'pymcdm')
-    results['pymcdm'] = pymcdm_info
+def check_functionalities() -> Dict[str, Any]:
+    """检查各功能模块的可用性（各包相互独立，并发探测）"""
+    with ThreadPoolExecutor(max_workers=len(_PACKAGES)) as executor:
+        futures = {
+            key: executor.submit(check_package, package_name, import_name)
+            for key, package_name, import_name in _PACKAGES
+        }
+        # 按 _PACKAGES 顺序收集，保持输出顺序稳定
+        return {key: future.result() for key, future in futures.items()}
 
-    # 检查 PIL/Pillow
-    pil_info = check_package('pillow', 'PIL')
-    results['pillow'] = pil_info
 
-    return results
+def check_iqa_analyzer(deep: bool = False) -> Dict[str, Any]:
+    """
+    检查IQA分析器是否可用
 
+    默认只做轻量检查（IQAAnalyzer.can_load），不加载模型权重，
+    因此无法发现权重下载失败等问题，结果中 model_loaded 为 None；
+    deep=True 时真正构造分析器（下载/加载数百 MB 模型，耗时数秒到数十秒）
+    """
+    # 缺少 PyTorch 时直接返回，不导入 iqa_analyzer
+    if importlib.util.find_spec('torch') is None or importlib.util.find_spec('torchvision') is None:
+        return {
+            'available': False,
+            'reason': 'PyTorch未安装'
+        }
 
-def check_iqa_analyzer() -> Dict[str, Any]:
-    """检查IQA分析器是否可用"""
     try:
         # 尝试导入 IQAAnalyzer
         sys.path.insert(0, 'scripts')
-        from iqa_analyzer import IQA_AVAILABLE
+        from iqa_analyzer import IQAAnalyzer
 
-        if IQA_AVAILABLE:
-            # 尝试初始化（可能加载模型）
-            from iqa_analyzer import IQAAnalyzer
-            analyzer = IQAAnalyzer(model_name="musiq", device="cpu")
-            return {
-                'available': True,
-                'model_loaded': analyzer.model is not None,
-                'device': analyzer.device,
-                'model_name': analyzer.model_name
-            }
-        else:
+        if not IQAAnalyzer.can_load("musiq"):
             return {
                 'available': False,
                 'reason': 'IQA_AVAILABLE = False'
             }
+
+        if not deep:
+            return {
+                'available': True,
+                'model_loaded': None,
+                'device': None,
+                'model_name': 'musiq'
+            }
+
+        # 深度检查：初始化分析器（会加载模型）
+        analyzer = IQAAnalyzer(model_name="musiq", device="cpu")
+        return {
+            'available': True,
+            'model_loaded': analyzer.model is not None,
+            'device': analyzer.device,
+            'model_name': analyzer.model_name
+        }
     except Exception as e:
         return {
             'available': False,
@@ -136,12 +158,14 @@ def check_iqa_analyzer() -> Dict[str, Any]:
 def check_color_analyzer() -> Dict[str, Any]:
     """检查颜色分析器是否可用"""
     try:
-        # 检查 scikit-image 是否可用
-        try:
-            from skimage.color import rgb2lab
-            harmonicity_available = True
-        except ImportError:
-            harmonicity_available = False
+        # 检查 scikit-image 是否可用（未安装时不尝试导入）
+        harmonicity_available = False
+        if importlib.util.find_spec('skimage') is not None:
+            try:
+                from skimage.color import rgb2lab
+                harmonicity_available = True
+            except ImportError:
+                pass
 
         return {
             'available': True,
@@ -195,7 +219,7 @@ def generate_summary(checks: Dict[str, Any]) -> Dict[str, Any]:
     if not checks['iqa']['available']:
         status['unavailable_features'].append('IQA美学评分')
         status['overall'] = 'degraded'
-    elif not checks['iqa'].get('model_loaded', False):
+    elif checks['iqa'].get('model_loaded') is False:
         status['degraded_features'].append('IQA模型加载')
 
     if not checks['color']['available']:
@@ -217,13 +241,18 @@ def generate_summary(checks: Dict[str, Any]) -> Dict[str, Any]:
     return status
 
 
-def main():
-    """主函数"""
+def get_env_status(deep: bool = False) -> Dict[str, Any]:
+    """
+    执行所有检查并返回报告字典（不输出任何内容，供 install_manager 等在进程内调用）
+
+    Args:
+        deep: 是否深度检查 IQA（真正加载模型）
+    """
     # 执行所有检查
     checks = {
         'python': check_python_info(),
         'functionalities': check_functionalities(),
-        'iqa': check_iqa_analyzer(),
+        'iqa': check_iqa_analyzer(deep=deep),
         'color': check_color_analyzer(),
         'mcdm': check_mcdm_analyzer()
     }
@@ -238,51 +267,68 @@ def main():
         'summary': summary
     }
 
-    # 输出 JSON 格式（便于智能体解析）
-    print(json.dumps(report, indent=2, ensure_ascii=False))
-
-    # 同时输出人类可读格式（便于用户查看）
-    print("\n" + "=" * 70, file=sys.stderr)
-    print("🔍 环境检查报告", file=sys.stderr)
-    print("=" * 70, file=sys.stderr)
+    return report
 
-    print(f"\n📋 Python 版本: {checks['python']['python_version']}", file=sys.stderr)
-    print(f"📍 Python 路径: {checks['python']['python_executable']}", file=sys.stderr)
 
-    print(f"\n📦 依赖包状态:", file=sys.stderr)
+def main(deep: bool = False):
+    """
+    主函数
+
+    Args:
+        deep: 是否深度检查 IQA（真正加载模型，命令行传 --deep）
+    """
+    report = get_env_status(deep=deep)
+    checks = report['checks']
+    summary = report['summary']
+
+    # 输出 JSON 格式（便于智能体解析）；直接写 stdout，不经 print 的逐行刷新
+    sys.stdout.write(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+    # 同时输出人类可读格式（便于用户查看）：整份报告拼好后一次写入 stderr
+    lines = [
+        "\n" + "=" * 70,
+        "🔍 环境检查报告",
+        "=" * 70,
+        f"\n📋 Python 版本: {checks['python']['python_version']}",
+        f"📍 Python 路径: {checks['python']['python_executable']}",
+        "\n📦 依赖包状态:",
+    ]
     for name, info in checks['functionalities'].items():
         if info['installed']:
             version = info.get('version', 'unknown')
-            print(f"  ✅ {name:20} 版本: {version}", file=sys.stderr)
+            lines.append(f"  ✅ {name:20} 版本: {version}")
         else:
-            print(f"  ❌ {name:20} 未安装", file=sys.stderr)
+            lines.append(f"  ❌ {name:20} 未安装")
 
-    print(f"\n🎯 功能可用性:", file=sys.stderr)
-    print(f"  IQA分析:          {'✅ 可用' if checks['iqa']['available'] else '❌ 不可用'}", file=sys.stderr)
-    print(f"  色彩分析:         {'✅ 可用' if checks['color']['available'] else '❌ 不可用'}", file=sys.stderr)
+    lines.append("\n🎯 功能可用性:")
+    lines.append(f"  IQA分析:          {'✅ 可用' if checks['iqa']['available'] else '❌ 不可用'}")
+    lines.append(f"  色彩分析:         {'✅ 可用' if checks['color']['available'] else '❌ 不可用'}")
     if checks['color'].get('harmonicity_analysis'):
-        print(f"    - 和谐度分析:   ✅ 精确版", file=sys.stderr)
+        lines.append("    - 和谐度分析:   ✅ 精确版")
     else:
-        print(f"    - 和谐度分析:   ⚠️  简化版（需要scikit-image）", file=sys.stderr)
-    print(f"  MCDM权重优化:     {'✅ 可用' if checks['mcdm']['available'] else '❌ 不可用'}", file=sys.stderr)
+        lines.append("    - 和谐度分析:   ⚠️  简化版（需要scikit-image）")
+    lines.append(f"  MCDM权重优化:     {'✅ 可用' if checks['mcdm']['available'] else '❌ 不可用'}")
 
-    print(f"\n📊 整体状态: {summary['overall'].upper()}", file=sys.stderr)
+    lines.append(f"\n📊 整体状态: {summary['overall'].upper()}")
 
     if summary['overall'] == 'ready':
-        print("  ✅ 所有功能正常，可以完整使用", file=sys.stderr)
+        lines.append("  ✅ 所有功能正常，可以完整使用")
     elif summary['overall'] == 'degraded':
-        print("  ⚠️  部分功能降级，但仍可使用", file=sys.stderr)
+        lines.append("  ⚠️  部分功能降级，但仍可使用")
         if summary['degraded_features']:
-            print(f"  降级功能: {', '.join(summary['degraded_features'])}", file=sys.stderr)
+            lines.append(f"  降级功能: {', '.join(summary['degraded_features'])}")
     else:  # critical
-        print("  ❌ 关键依赖缺失，部分核心功能不可用", file=sys.stderr)
+        lines.append("  ❌ 关键依赖缺失，部分核心功能不可用")
         if summary['unavailable_features']:
-            print(f"  不可用功能: {', '.join(summary['unavailable_features'])}", file=sys.stderr)
+            lines.append(f"  不可用功能: {', '.join(summary['unavailable_features'])}")
+
+    lines.append("\n" + "=" * 70)
 
-    print("\n" + "=" * 70, file=sys.stderr)
+    sys.stderr.write("\n".join(lines) + "\n")
+    sys.stderr.flush()
 
     return report
 
 
 if __name__ == '__main__':
-    main()
+    main(deep='--deep' in sys.argv[1:])
@@ -5,8 +5,9 @@
 """
 
 import sys
-import subprocess
+import site
 import os
+from importlib.metadata import distributions
 
 def check_python_info():
     """检查 Python 信息"""
@@ -74,34 +75,27 @@ def check_torch_info():
     print()
 
 def check_pip_info():
-    """检查 pip 信息"""
+    """检查 pip 信息（进程内读取安装元数据，不再调用 pip list）"""
     print("=" * 60)
     print("📥 pip 包列表")
     print("=" * 60)
     
     try:
-        result = subprocess.run(
-            ['pip', 'list'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        # 筛选相关包
+        target_packages = ['torch', 'torchvision', 'numpy', 'pillow', 'scikit', 'pymcdm']
         
-        if result.returncode == 0:
-            packages = result.stdout.split('\n')
-            
-            # 筛选相关包
-            target_packages = ['torch', 'torchvision', 'numpy', 'pillow', 'scikit', 'pymcdm']
-            
-            print("已安装的相关包:")
-            for pkg in packages:
-                pkg_lower = pkg.lower()
-                for target in target_packages:
-                    if target in pkg_lower:
-                        print(f"  - {pkg}")
-                        break
-        else:
-            print(f"❌ pip list 执行失败: {result.stderr}")
+        # 同名包可能出现在多个路径中，与 pip 一样只取第一个
+        installed = {}
+        for dist in distributions():
+            name = dist.metadata['Name']
+            if name and name.lower() not in installed:
+                installed[name.lower()] = (name, dist.version)
+        
+        print("已安装的相关包:")
+        for key in sorted(installed):
+            if any(target in key for target in target_packages):
+                name, version = installed[key]
+                print(f"  - {name} {version}")
     
     except Exception as e:
         print(f"❌ 检查失败: {e}")
@@ -115,28 +109,11 @@ def check_site_packages():
     print("=" * 60)
     
     try:
-        site_packages = subprocess.run(
-            [sys.executable, '-m', 'site', '--user-site'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if site_packages.returncode == 0:
-            print(f"用户 site-packages: {site_packages.stdout.strip()}")
-        
-        system_site = subprocess.run(
-            [sys.executable, '-m', 'site'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
+        print(f"用户 site-packages: {site.getusersitepackages()}")
         
-        if system_site.returncode == 0:
-            print(f"\n系统 site-packages:")
-            for line in system_site.stdout.split('\n'):
-                if 'site-packages' in line and 'dist-packages' in line:
-                    print(f"  - {line.strip()}")
+        print(f"\n系统 site-packages:")
+        for path in site.getsitepackages():
+            print(f"  - {path}")
     
     except Exception as e:
         print(f"❌ 检查失败: {e}")
@@ -7,8 +7,105 @@
 import sys
 import subprocess
 import os
+import io
+import re
+import json
+import shutil
+import hashlib
+import threading
+import traceback
+import unicodedata
+import importlib.machinery
+import importlib.util
+from importlib import metadata
 import platform
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 只取决于已安装包的检查段，环境指纹不变时复用上次的输出；磁盘、内存等每次重新检查
+_CACHEABLE_SECTIONS = ('check_pip_info', 'check_module_imports', 'check_pytorch_details')
+_CACHE_DIR = Path.home() / '.cache' / 'photo-tutor'
+
+# 脚本所在目录：磁盘检查与模块导入都以此为准，结果不随运行时的工作目录变化
+_SCRIPT_DIR = Path(__file__).resolve().parent
+
+class _SectionStdout:
+    """
+    按线程分发的 stdout
+
+    各检查段在线程池中并行运行，段内 print 写入本线程的缓冲区，
+    主线程最后按固定顺序输出，各段内容不会交错
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def _run_captured(section):
+    """在当前线程运行一个检查段，返回 (输出文本, 异常或 None)"""
+    buffer = io.StringIO()
+    sys.stdout._local.buffer = buffer
+    try:
+        section()
+        return buffer.getvalue(), None
+    except Exception as e:
+        return buffer.getvalue(), e
+    finally:
+        sys.stdout._local.buffer = None
+
+def _section_name(section):
+    """检查段的函数名（partial 取其原函数）"""
+    return getattr(section, 'func', section).__name__
+
+def _environment_fingerprint(check_cuda):
+    """环境指纹：解释器路径与修改时间 + 所有已安装发行包的名称和版本"""
+    dists = sorted({(dist.metadata['Name'] or '', dist.version) for dist in metadata.distributions()})
+    key = json.dumps([sys.executable, os.path.getmtime(sys.executable), check_cuda, dists])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def _load_section_cache(cache_path):
+    """读取缓存的检查段输出（不存在或损坏时返回空字典）"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_section_cache(cache_path, sections):
+    """写入检查段输出缓存（失败时忽略，不影响诊断）"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(sections, f, ensure_ascii=False)
+    except OSError:
+        pass
+
+def _ljust_display(text, width):
+    """
+    按终端显示宽度左对齐
+
+    str.ljust / 格式化宽度按字符数计算，中文等全角字符占两列，会把后面的列挤歪
+    """
+    display_width = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    return text + ' ' * max(width - display_width, 0)
 
 def print_section(title):
     """打印分节标题"""
@@ -56,9 +153,11 @@ def check_system_info():
     """检查系统信息"""
     print_section("系统信息")
 
-    print(f"操作系统: {platform.system()} {platform.release()}")
-    print(f"架构: {platform.machine()}")
-    print(f"主机名: {platform.node()}")
+    # platform.uname() 一次取齐系统、版本、架构、主机名
+    uname = platform.uname()
+    print(f"操作系统: {uname.system} {uname.release}")
+    print(f"架构: {uname.machine}")
+    print(f"主机名: {uname.node}")
     print(f"Python 版本: {sys.version}")
     print(f"Python 实现方式: {platform.python_implementation()}")
     print(f"Python 编译器: {platform.python_compiler()}")
@@ -81,47 +180,103 @@ def check_python_paths():
         if path:
             print(f"  {i}. {path}")
 
+def _normalize_pkg_name(name):
+    """规范化包名（PEP 503：不区分大小写，-、_、. 视为相同）"""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def _installed_distributions():
+    """
+    进程内读取已安装的发行包（规范化包名 → Distribution）
+
+    与 pip 一样，同名包出现在多个路径时只取 sys.path 中靠前的一个
+    """
+    installed = {}
+    for dist in metadata.distributions():
+        name = dist.metadata['Name']
+        if name and _normalize_pkg_name(name) not in installed:
+            installed[_normalize_pkg_name(name)] = dist
+    return installed
+
 def check_pip_info():
-    """检查 pip 信息"""
+    """检查 pip 信息（进程内读取安装元数据，不启动 pip 子进程）"""
     print_section("pip 包列表")
 
-    result = run_command('pip list 2>/dev/null | head -50')
-
-    if result['success']:
-        print_subsection("已安装的包（前50个）")
-        print(result['stdout'])
-
-        # 检查关键包
-        print_subsection("关键包检查")
-        target_packages = {
-            'torch': 'PyTorch',
-            'torchvision': 'TorchVision',
-            'numpy': 'NumPy',
-            'pillow': 'PIL/Pillow',
-            'scikit-image': 'scikit-image (skimage)',
-            'scikit-learn': 'scikit-learn (sklearn)',
-            'pymcdm': 'pyMCDM'
-        }
+    try:
+        installed = _installed_distributions()
+    except Exception as e:
+        print(f"❌ 获取 pip 列表失败: {e}")
+        return
+
+    print_subsection("已安装的包（前50个）")
+    dists = sorted(installed.values(), key=lambda d: d.metadata['Name'].lower())[:50]
+    rows = [(dist.metadata['Name'], dist.version) for dist in dists]
+    # 按 pip list 的表格格式输出
+    width = max([len('Package')] + [len(name) for name, _ in rows])
+    version_width = max([len('Version')] + [len(version) for _, version in rows])
+    lines = [f"{'Package':{width}} Version", f"{'-' * width} {'-' * version_width}"]
+    lines += [f"{name:{width}} {version}" for name, version in rows]
+    print('\n'.join(lines))
+
+    # 检查关键包
+    print_subsection("关键包检查")
+    target_packages = {
+        'torch': 'PyTorch',
+        'torchvision': 'TorchVision',
+        'numpy': 'NumPy',
+        'pillow': 'PIL/Pillow',
+        'scikit-image': 'scikit-image (skimage)',
+        'scikit-learn': 'scikit-learn (sklearn)',
+        'pymcdm': 'pyMCDM'
+    }
+
+    for pkg_name, display_name in target_packages.items():
+        dist = installed.get(_normalize_pkg_name(pkg_name))
+        if dist is not None:
+            version = dist.version or 'unknown'
+            location = dist.locate_file('')
+            print(f"  ✅ {_ljust_display(display_name, 30)} 版本: {version:15} 位置: {location}")
+        else:
+            print(f"  ❌ {_ljust_display(display_name, 30)} 未安装")
+
+# 顶层模块名 → 发行包名（用于读取版本号）
+_DIST_NAMES = {
+    'PIL': 'Pillow',
+    'skimage': 'scikit-image',
+    'sklearn': 'scikit-learn',
+}
+
+def _find_module_spec(module_name):
+    """
+    查找模块规格但不执行模块代码
+
+    importlib.util.find_spec 查子模块时会先导入父包（torchvision.models 会连带导入 torch），
+    这里沿包路径逐级用 PathFinder 查找，整个过程不导入任何模块
+    """
+    parts = module_name.split('.')
+    spec = importlib.util.find_spec(parts[0])
+    for i in range(1, len(parts)):
+        if spec is None or spec.submodule_search_locations is None:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(
+            '.'.join(parts[:i + 1]), spec.submodule_search_locations
+        )
+    return spec
 
-        for pkg_name, display_name in target_packages.items():
-            result = run_command(f'pip show {pkg_name} 2>/dev/null')
-            if result['success'] and result['stdout']:
-                lines = result['stdout'].split('\n')
-                version = 'unknown'
-                location = 'unknown'
-                for line in lines:
-                    if line.startswith('Version:'):
-                        version = line.split(':', 1)[1].strip()
-                    elif line.startswith('Location:'):
-                        location = line.split(':', 1)[1].strip()
-                print(f"  ✅ {display_name:30} 版本: {version:15} 位置: {location}")
-            else:
-                print(f"  ❌ {display_name:30} 未安装")
-    else:
-        print(f"❌ 获取 pip 列表失败: {result['stderr']}")
+def _dist_version(module_name):
+    """读取模块所属发行包的版本（不导入模块）"""
+    top_level = module_name.split('.')[0]
+    try:
+        return metadata.version(_DIST_NAMES.get(top_level, top_level))
+    except metadata.PackageNotFoundError:
+        return 'N/A'
 
 def check_module_imports():
-    """检查模块导入"""
+    """
+    检查模块是否可导入
+
+    只查找模块规格、读取安装元数据，不真正执行导入（导入 torch 需数秒并会初始化 CUDA）；
+    真实导入在后面的 PyTorch / IQA 检查中进行，安装损坏导致的导入错误会在那里暴露
+    """
     print_section("模块导入测试")
 
     test_modules = [
@@ -141,14 +296,22 @@ def check_module_imports():
     failed_imports = []
 
     for module_name, display_name in test_modules:
+        name_cell = _ljust_display(display_name, 30)
         try:
-            module = __import__(module_name)
-            version = getattr(module, '__version__', 'N/A')
-            file_path = getattr(module, '__file__', 'N/A')
-            print(f"  ✅ {display_name:30} 版本: {version:10}  路径: {file_path[:50]}...")
-        except ImportError as e:
-            print(f"  ❌ {display_name:30} 失败: {str(e)[:40]}")
-            failed_imports.append((module_name, display_name, str(e)))
+            spec = _find_module_spec(module_name)
+        except (ImportError, ValueError) as e:
+            spec = None
+            error = str(e)
+        else:
+            error = f"No module named '{module_name}'"
+
+        if spec is not None:
+            version = _dist_version(module_name)
+            file_path = spec.origin or 'N/A'
+            print(f"  ✅ {name_cell} 版本: {version:10}  路径: {file_path[:50]}...")
+        else:
+            print(f"  ❌ {name_cell} 失败: {error[:40]}")
+            failed_imports.append((module_name, display_name, error))
 
     if failed_imports:
         print_subsection("失败的导入详情")
@@ -158,8 +321,14 @@ def check_module_imports():
             print(f"  错误: {error}")
             print()
 
-def check_pytorch_details():
-    """检查 PyTorch 详细信息"""
+def check_pytorch_details(check_cuda=False):
+    """
+    检查 PyTorch 详细信息
+
+    torch.cuda.is_available() / get_device_name() 会加载驱动并在各 GPU 上创建 CUDA 上下文
+    （每卡数百 MB、耗时数秒），默认只看 torch.version.cuda 并用 NVML 计数，
+    命令行传 --check-cuda 时才做完整的 CUDA 检查
+    """
     print_section("PyTorch 详细信息")
 
     try:
@@ -168,16 +337,32 @@ def check_pytorch_details():
 
         print(f"PyTorch 版本: {torch.__version__}")
         print(f"TorchVision 版本: {torchvision.__version__}")
-        print(f"CUDA 可用: {torch.cuda.is_available()}")
 
-        if torch.cuda.is_available():
-            print(f"CUDA 版本: {torch.version.cuda}")
-            print(f"cuDNN 版本: {torch.backends.cudnn.version()}")
-            print(f"GPU 数量: {torch.cuda.device_count()}")
-            for i in range(torch.cuda.device_count()):
-                print(f"  GPU {i}: {torch.cuda.get_device_name(i)}")
-        else:
+        if torch.version.cuda is None:
+            # CPU 版本的 PyTorch，无需探测 CUDA
+            print("CUDA 可用: False (CPU 版本 PyTorch)")
             print("默认设备: cpu")
+        else:
+            print(f"CUDA 版本: {torch.version.cuda}")
+            # NVML 计数不创建 CUDA 上下文，且遵循 CUDA_VISIBLE_DEVICES
+            count_nvml = getattr(torch.cuda, '_device_count_nvml', None)
+            gpu_count = count_nvml() if count_nvml is not None else -1
+            if gpu_count >= 0:
+                print(f"GPU 数量 (NVML): {gpu_count}")
+            else:
+                print("GPU 数量 (NVML): 无法获取")
+
+            if check_cuda:
+                print(f"CUDA 可用: {torch.cuda.is_available()}")
+                if torch.cuda.is_available():
+                    print(f"cuDNN 版本: {torch.backends.cudnn.version()}")
+                    print(f"GPU 数量: {torch.cuda.device_count()}")
+                    for i in range(torch.cuda.device_count()):
+                        print(f"  GPU {i}: {torch.cuda.get_device_name(i)}")
+                else:
+                    print("默认设备: cpu")
+            else:
+                print("（跳过 CUDA 初始化，传 --check-cuda 查看 GPU 名称与 cuDNN 版本）")
 
         print(f"\nPyTorch 安装路径:")
         print(f"  {torch.__file__}")
@@ -188,14 +373,18 @@ def check_pytorch_details():
     except ImportError as e:
         print(f"❌ PyTorch 导入失败: {e}")
 
-def test_iqa_analyzer():
-    """测试 IQA 分析器"""
+def test_iqa_analyzer(init_model=False):
+    """
+    测试 IQA 分析器
+
+    默认只检查 IQA_AVAILABLE；构造 IQAAnalyzer 会导入 torch 并加载 MUSIQ 权重（数秒到数十秒），
+    命令行传 --init-model 时才实际初始化
+    """
     print_section("IQA 分析器测试")
 
     # 添加 scripts 目录到路径
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    if script_dir not in sys.path:
-        sys.path.insert(0, script_dir)
+    if str(_SCRIPT_DIR) not in sys.path:
+        sys.path.insert(0, str(_SCRIPT_DIR))
 
     try:
         print_subsection("导入 IQAAnalyzer")
@@ -208,6 +397,10 @@ def test_iqa_analyzer():
             print(f"   这意味着在导入 iqa_analyzer.py 时，PyTorch 导入失败")
             return
 
+        if not init_model:
+            print("⏭️  跳过模型初始化（传 --init-model 实际加载 MUSIQ 模型）")
+            return
+
         print_subsection("初始化 IQAAnalyzer")
         from iqa_analyzer import IQAAnalyzer
 
@@ -221,12 +414,10 @@ def test_iqa_analyzer():
             print(f"❌ IQAAnalyzer 初始化失败: {e}")
         except Exception as e:
             print(f"❌ IQAAnalyzer 初始化异常: {e}")
-            import traceback
             traceback.print_exc()
 
     except Exception as e:
         print(f"❌ 导入 IQAAnalyzer 失败: {e}")
-        import traceback
         traceback.print_exc()
 
 def check_environment_variables():
@@ -242,24 +433,24 @@ def check_environment_variables():
     ]
 
     for var in env_vars:
-        if var in os.environ:
-            value = os.environ[var]
-            # 截断过长的值
-            if len(value) > 100:
-                value = value[:100] + "..."
-            print(f"{var:20} = {value}")
-        else:
+        value = os.environ.get(var)
+        if value is None:
             print(f"{var:20} = (未设置)")
+            continue
+        # 截断过长的值
+        if len(value) > 100:
+            value = value[:100] + "..."
+        print(f"{var:20} = {value}")
 
 def check_disk_space():
     """检查磁盘空间"""
     print_section("磁盘空间")
 
-    import shutil
-
-    print_subsection("当前目录磁盘使用情况")
+    print_subsection("项目所在磁盘使用情况")
     try:
-        total, used, free = shutil.disk_usage(os.getcwd())
+        total, used, free = shutil.disk_usage(_SCRIPT_DIR)
+
+        print(f"检查路径: {_SCRIPT_DIR}")
 
         print(f"总空间: {total / (1024**3):.2f} GB")
         print(f"已使用: {used / (1024**3):.2f} GB ({used/total*100:.1f}%)")
@@ -267,19 +458,41 @@ def check_disk_space():
     except Exception as e:
         print(f"❌ 获取磁盘空间失败: {e}")
 
+def _read_proc_meminfo():
+    """
+    读取 Linux /proc/meminfo，返回 (总内存, 可用内存) 字节数
+
+    无需 psutil；文件不存在或缺少字段（如内核 < 3.14 没有 MemAvailable）时返回 None
+    """
+    try:
+        with open('/proc/meminfo', 'rb') as f:
+            fields = dict(line.split(b':', 1) for line in f.read().splitlines() if b':' in line)
+        # 数值单位为 kB
+        total = int(fields[b'MemTotal'].split()[0]) * 1024
+        available = int(fields[b'MemAvailable'].split()[0]) * 1024
+    except (OSError, KeyError, ValueError, IndexError):
+        return None
+    return total, available
+
 def check_memory():
-    """检查内存"""
+    """检查内存（Linux 直接读 /proc/meminfo，其他平台使用 psutil）"""
     print_section("内存信息")
 
-    try:
-        import psutil
+    meminfo = _read_proc_meminfo() if sys.platform.startswith('linux') else None
+    if meminfo is not None:
+        total, available = meminfo
+        used = total - available
+        percent = round(used / total * 100, 1)
+    elif PSUTIL_AVAILABLE:
         mem = psutil.virtual_memory()
-
-        print(f"总内存: {mem.total / (1024**3):.2f} GB")
-        print(f"可用内存: {mem.available / (1024**3):.2f} GB")
-        print(f"已使用: {mem.used / (1024**3):.2f} GB ({mem.percent}%)")
-    except ImportError:
+        total, available, used, percent = mem.total, mem.available, mem.used, mem.percent
+    else:
         print("⚠️  psutil 未安装，无法获取内存信息")
+        return
+
+    print(f"总内存: {total / (1024**3):.2f} GB")
+    print(f"可用内存: {available / (1024**3):.2f} GB")
+    print(f"已使用: {used / (1024**3):.2f} GB ({percent}%)")
 
 def generate_summary():
     """生成总结"""
@@ -291,7 +504,7 @@ def generate_summary():
     print("   1. PyTorch 和 TorchVision 是否已安装？")
     print("   2. PyTorch 是否可以正常导入？")
     print("   3. IQA_AVAILABLE 是否为 True？")
-    print("   4. IQAAnalyzer 是否可以成功初始化？")
+    print("   4. IQAAnalyzer 是否可以成功初始化？（需 --init-model）")
     print()
 
     print("🔧 如果 IQA_AVAILABLE 为 False:")
@@ -306,20 +519,63 @@ def generate_summary():
     print("   - 说明问题现象（例如：IQA分析功能不可用）")
     print()
 
-def main():
-    """主函数"""
-    print("\n" + "🔍 部署环境完整诊断工具".center(70, "=") + "\n")
-
+def main(check_cuda=False, use_cache=True, init_model=False):
+    """
+    主函数
+
+    整份报告先写入内存缓冲区，结束时一次性写到 stdout
+
+    Args:
+        check_cuda: 是否完整检查 CUDA（创建 CUDA 上下文，命令行传 --check-cuda）
+        use_cache: 环境未变化时复用 pip / 模块 / PyTorch 检查结果（命令行传 --no-cache 关闭）
+        init_model: 是否实际初始化 IQA 模型（加载权重，命令行传 --init-model）
+    """
+    stdout = sys.stdout
+    report = io.StringIO()
+    sys.stdout = _SectionStdout(stdout)
+    # 主线程的 print 同样写入报告缓冲区
+    sys.stdout._local.buffer = report
     try:
-        check_system_info()
-        check_python_paths()
-        check_environment_variables()
-        check_pip_info()
-        check_module_imports()
-        check_pytorch_details()
-        test_iqa_analyzer()
-        check_disk_space()
-        check_memory()
+        print("\n" + "🔍 部署环境完整诊断工具".center(70, "=") + "\n")
+
+        cache_path = None
+        cached = {}
+        if use_cache:
+            cache_path = _CACHE_DIR / f"diag-{_environment_fingerprint(check_cuda)}.json"
+            cached = _load_section_cache(cache_path)
+            if cached:
+                print("ℹ️  环境未变化，pip / 模块导入 / PyTorch 检查复用上次结果（传 --no-cache 重新检查）")
+
+        # 各检查段互相独立（子进程、导入、磁盘统计），并行执行后按原顺序输出
+        sections = [
+            check_system_info,
+            check_python_paths,
+            check_environment_variables,
+            check_pip_info,
+            check_module_imports,
+            partial(check_pytorch_details, check_cuda=check_cuda),
+            partial(test_iqa_analyzer, init_model=init_model),
+            check_disk_space,
+            check_memory,
+        ]
+
+        def run_section(section):
+            name = _section_name(section)
+            if name in cached:
+                return cached[name], None
+            return _run_captured(section)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for section, (output, error) in zip(sections, executor.map(run_section, sections)):
+                report.write(output)
+                if error is not None:
+                    raise error
+                if _section_name(section) in _CACHEABLE_SECTIONS:
+                    cached[_section_name(section)] = output
+
+        if cache_path is not None:
+            _save_section_cache(cache_path, cached)
+
         generate_summary()
 
         print("=" * 70)
@@ -330,8 +586,16 @@ def main():
         print("\n\n⚠️  用户中断诊断")
     except Exception as e:
         print(f"\n\n❌ 诊断过程中发生错误: {e}")
-        import traceback
         traceback.print_exc()
+    finally:
+        sys.stdout = stdout
+        stdout.write(report.getvalue())
+        stdout.flush()
 
 if __name__ == '__main__':
-    main()
+    args = sys.argv[1:]
+    main(
+        check_cuda='--check-cuda' in args,
+        use_cache='--no-cache' not in args,
+        init_model='--init-model' in args
+    )
@@ -5,10 +5,30 @@
 """
 
 import sys
+import argparse
+import codecs
 import json
 import os
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 带 BOM 的文件直接按 BOM 确定编码（UTF-32 须先于 UTF-16 判断，二者 LE 前缀相同）
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# 评分数据必需的六个维度
+_REQUIRED_DIMS = frozenset(('composition', 'lighting', 'color', 'creativity', 'technical', 'emotion'))
+
 
 def diagnose_file(file_path: str) -> dict:
     """诊断文件问题"""
@@ -30,23 +50,34 @@ def diagnose_file(file_path: str) -> dict:
     result['file_exists'] = True
     result['file_size'] = os.path.getsize(file_path)
 
-    # 尝试检测编码
     encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp936']
     successful_encoding = None
+    content = None
 
+    # 只读一次文件，候选编码在内存中依次尝试解码
+    try:
+        raw = Path(file_path).read_bytes()
+    except Exception as e:
+        print(f"⚠️  读取文件失败: {str(e)[:50]}", file=sys.stderr)
+        raw, encodings = None, []
+
+    # 有 BOM 时只尝试对应编码，无需逐个试错
+    if raw:
+        for bom, bom_encoding in _BOM_ENCODINGS:
+            if raw.startswith(bom):
+                encodings = [bom_encoding]
+                break
+
+    # 尝试检测编码
     for encoding in encodings:
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
+            content = raw.decode(encoding)
             successful_encoding = encoding
             print(f"✅ 成功用 {encoding} 编码读取文件", file=sys.stderr)
             break
         except (UnicodeDecodeError, UnicodeError) as e:
             print(f"⚠️  {encoding} 编码失败: {str(e)[:50]}", file=sys.stderr)
             continue
-        except Exception as e:
-            print(f"⚠️  读取文件失败: {str(e)[:50]}", file=sys.stderr)
-            break
 
     if not successful_encoding:
         result['suggestions'].append("❌ 无法用任何编码读取文件，可能是二进制文件或损坏")
@@ -55,10 +86,17 @@ def diagnose_file(file_path: str) -> dict:
 
     result['encoding'] = successful_encoding
 
-    # 尝试用成功编码读取并验证JSON
+    # 验证JSON：UTF-8 文件有 orjson 时直接解析原始字节（跳过中间 str，大文件更快更省内存），
+    # 否则解析已解码的文本
     try:
-        with open(file_path, 'r', encoding=successful_encoding) as f:
-            data = json.load(f)
+        if ORJSON_AVAILABLE and successful_encoding in ('utf-8', 'utf-8-sig'):
+            content = None
+            if successful_encoding == 'utf-8-sig':
+                raw = raw[len(codecs.BOM_UTF8):]
+            data = orjson.loads(raw)
+        else:
+            data = json.loads(content)
+        del raw, content
         result['json_valid'] = True
         result['data_structure'] = analyze_structure(data)
         print(f"✅ JSON 格式有效", file=sys.stderr)
@@ -103,22 +141,18 @@ def analyze_structure(data: any) -> dict:
             if isinstance(first_item, dict):
                 structure['is_dict'] = True
                 structure['dimensions'] = list(first_item.keys())
-                required_dims = ['composition', 'lighting', 'color', 'creativity', 'technical', 'emotion']
-                structure['has_six_dimensions'] = all(dim in structure['dimensions'] for dim in required_dims)
+                structure['has_six_dimensions'] = _REQUIRED_DIMS.issubset(first_item.keys())
 
     elif isinstance(data, dict):
         structure['is_dict'] = True
         structure['dimensions'] = list(data.keys())
-        required_dims = ['composition', 'lighting', 'color', 'creativity', 'technical', 'emotion']
-        structure['has_six_dimensions'] = all(dim in structure['dimensions'] for dim in required_dims)
+        structure['has_six_dimensions'] = _REQUIRED_DIMS.issubset(data.keys())
 
     return structure
 
 
 def main():
     """主函数"""
-    import argparse
-
     parser = argparse.ArgumentParser(description='评分数据文件诊断工具')
     parser.add_argument('file', help='评分数据文件路径')
     args = parser.parse_args()
@@ -8,11 +8,16 @@ import sys
 import os
 import subprocess
 import json
-import time
 import signal
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 class InstallManager:
     """依赖安装管理器"""
@@ -21,16 +26,22 @@ class InstallManager:
         self.log_file = log_file
         self.pid_file = "install.pid"
         self.status_file = "install_status.json"
+        # 本进程启动的安装子进程（用 poll 判断是否结束，避免已退出的子进程残留为僵尸仍被 kill(pid, 0) 判为运行中）
+        self._process: Optional[subprocess.Popen] = None
 
     def is_installing(self) -> bool:
         """检查是否正在安装"""
-        if not os.path.exists(self.pid_file):
-            return False
-
         try:
+            # 直接打开 pid 文件（不存在时捕获异常），省去先 exists 再 open 的一次 stat
             with open(self.pid_file, 'r') as f:
                 pid = int(f.read().strip())
 
+            if self._process is not None and self._process.pid == pid:
+                if self._process.poll() is None:
+                    return True
+                os.remove(self.pid_file)
+                return False
+
             # 检查进程是否还在运行
             try:
                 os.kill(pid, 0)
@@ -44,16 +55,16 @@ class InstallManager:
 
     def get_status(self) -> Dict[str, Any]:
         """获取安装状态"""
-        if not os.path.exists(self.status_file):
+        try:
+            with open(self.status_file, 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+        except FileNotFoundError:
             return {
                 'status': 'not_started',
                 'progress': 0,
                 'message': '未开始安装'
             }
-
-        try:
-            with open(self.status_file, 'r') as f:
-                return json.load(f)
         except Exception:
             return {
                 'status': 'unknown',
@@ -71,9 +82,7 @@ class InstallManager:
             }
 
         # 清理旧的状态文件
-        for f in [self.log_file, self.status_file, self.pid_file]:
-            if os.path.exists(f):
-                os.remove(f)
+        self._remove_state_files()
 
         if background:
             # 后台安装
@@ -102,25 +111,23 @@ class InstallManager:
             return self._run_install()
 
     def _run_background(self) -> int:
-        """后台运行安装脚本"""
-        try:
-            # 使用 nohup 和 & 实现后台运行
-            cmd = f"nohup bash scripts/install_dependencies.sh > {self.log_file} 2>&1 &"
-            subprocess.run(cmd, shell=True, check=True)
+        """
+        后台运行安装脚本
 
-            # 获取后台进程的 PID
-            time.sleep(1)  # 等待进程启动
-            result = subprocess.run(
-                "pgrep -f 'install_dependencies.sh' | head -1",
-                shell=True,
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                return int(result.stdout.strip())
-            else:
-                return -1
+        Popen 直接返回子进程 PID，不再经 shell + nohup 启动后 sleep 再用 pgrep 查找；
+        start_new_session 让安装进程脱离当前会话，终端关闭时不会收到 SIGHUP（等同 nohup）
+        """
+        try:
+            with open(self.log_file, 'wb') as log:
+                self._process = subprocess.Popen(
+                    ['bash', 'scripts/install_dependencies.sh'],
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True,
+                    close_fds=True
+                )
+            return self._process.pid
 
         except Exception as e:
             print(f"启动后台安装失败: {e}", file=sys.stderr)
@@ -144,8 +151,7 @@ class InstallManager:
                 'error': result.stderr
             }
 
-            with open(self.status_file, 'w') as f:
-                json.dump(status, f, indent=2)
+            self._write_status(status)
 
             return {
                 'success': result.returncode == 0,
@@ -174,11 +180,20 @@ class InstallManager:
                 }
             }
 
+    def _write_status(self, status: Dict[str, Any]):
+        """写入状态文件：先写临时文件再 os.replace 原子替换，轮询方不会读到写了一半的文件"""
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(status, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(status, indent=2).encode('utf-8')
+
+        tmp_file = self.status_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, self.status_file)
+
     def cancel_install(self) -> bool:
         """取消安装"""
-        if not os.path.exists(self.pid_file):
-            return False
-
         try:
             with open(self.pid_file, 'r') as f:
                 pid = int(f.read().strip())
@@ -186,16 +201,44 @@ class InstallManager:
             os.kill(pid, signal.SIGTERM)
 
             # 清理文件
-            for f in [self.log_file, self.status_file, self.pid_file]:
-                if os.path.exists(f):
-                    os.remove(f)
+            self._remove_state_files()
 
             return True
 
+        except FileNotFoundError:
+            return False
         except Exception as e:
             print(f"取消安装失败: {e}", file=sys.stderr)
             return False
 
+    def _remove_state_files(self):
+        """删除日志/状态/pid 文件（不存在的跳过）"""
+        for f in [self.log_file, self.status_file, self.pid_file]:
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+
+
+def _get_env_status() -> Dict[str, Any]:
+    """
+    获取环境检查报告
+
+    优先在进程内调用 check_env_json.get_env_status，省去启动新解释器的开销；
+    旧版 check_env_json 没有该函数（或导入失败）时退回子进程方式
+    """
+    try:
+        from check_env_json import get_env_status
+    except ImportError:
+        result = subprocess.run(
+            ['python3', 'scripts/check_env_json.py'],
+            capture_output=True,
+            text=True
+        )
+        return json.loads(result.stdout)
+
+    return get_env_status()
+
 
 def main():
     """主函数"""
@@ -222,14 +265,8 @@ def main():
             }, indent=2))
         else:
             # 检查是否已经安装成功
-            result = subprocess.run(
-                ['python3', 'scripts/check_env_json.py'],
-                capture_output=True,
-                text=True
-            )
-
             try:
-                env_status = json.loads(result.stdout)
+                env_status = _get_env_status()
                 summary = env_status.get('summary', {})
                 overall = summary.get('overall', 'unknown')
 
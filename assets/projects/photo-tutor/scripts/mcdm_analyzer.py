@@ -10,6 +10,7 @@ MCDM（多准则决策分析）评分权重优化器（修复版）
 import os
 import sys
 import json
+import codecs
 import argparse
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
@@ -24,6 +25,74 @@ except ImportError:
     print("⚠️  pymcdm未安装，MCDM分析功能不可用", file=sys.stderr)
     print("   请安装: pip install pymcdm", file=sys.stderr)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba 为可选依赖：可用时 CRITIC 权重走 JIT 内核
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # 固定类型签名：导入时即编译（cache=True 时直接读取磁盘缓存）；
+    # error_model='numpy'：常数列等退化输入与 pymcdm 一样得到 nan，而不是抛 ZeroDivisionError
+    @numba.njit('f8[::1](f8[:, ::1])', cache=True, nogil=True, error_model='numpy')
+    def _critic_weights_numba(matrix):
+        """
+        CRITIC 权重（与 pymcdm.weights.critic_weights 的计算一致）
+
+        各列 min-max 归一化（常数列为全 1），权重正比于
+        列标准差（ddof=1）× Σ(1 - 与各列的 Pearson 相关系数)
+
+        参数:
+            matrix: (N, M) float64，行为照片，列为评分维度
+        """
+        n, m = matrix.shape
+        norm = np.empty((n, m))
+        mean = np.empty(m)
+        for j in range(m):
+            lo = matrix[0, j]
+            hi = matrix[0, j]
+            for i in range(1, n):
+                lo = min(lo, matrix[i, j])
+                hi = max(hi, matrix[i, j])
+            total = 0.0
+            for i in range(n):
+                if lo == hi:
+                    norm[i, j] = 1.0
+                else:
+                    norm[i, j] = (matrix[i, j] - lo) / (hi - lo)
+                total += norm[i, j]
+            mean[j] = total / n
+
+        # 协方差矩阵（总体协方差，对角线即总体方差）
+        cov = np.zeros((m, m))
+        for i in range(n):
+            for a in range(m):
+                da = norm[i, a] - mean[a]
+                for b in range(a, m):
+                    cov[a, b] += da * (norm[i, b] - mean[b])
+        for a in range(m):
+            for b in range(a, m):
+                cov[a, b] /= n
+                cov[b, a] = cov[a, b]
+
+        weights = np.empty(m)
+        weights_sum = 0.0
+        for a in range(m):
+            conflict = 0.0
+            for b in range(m):
+                conflict += 1.0 - cov[a, b] / np.sqrt(cov[a, a] * cov[b, b])
+            weights[a] = np.sqrt(cov[a, a] * n / (n - 1)) * conflict
+            weights_sum += weights[a]
+        return weights / weights_sum
+
 
 class MCDMAnalyzer:
     """MCDM评分权重优化器"""
@@ -61,11 +130,11 @@ class MCDMAnalyzer:
         }
     
     def _extract_matrix(self, scores: List[Dict[str, float]]) -> np.ndarray:
-        matrix = []
-        for score in scores:
-            row = [score.get(dim, 0) for dim in self.DIMENSIONS]
-            matrix.append(row)
-        return np.array(matrix)
+        dimensions = self.DIMENSIONS
+        return np.array(
+            [[score.get(dim, 0) for dim in dimensions] for score in scores],
+            dtype=np.float64
+        )
     
     def _calculate_weights(self, matrix: np.ndarray) -> Dict[str, float]:
         if self.method == 'CRITIC':
@@ -81,11 +150,19 @@ class MCDMAnalyzer:
         else:
             weights = self._critic_weights(matrix)
         
+        # 退化输入（某维度各照片得分相同、只有一张照片）时权重为 nan：改用默认权重，
+        # 避免 nan 传入贡献度与总分，JSON 输出也不再因序列化库不同而是 NaN 或 null
+        if not np.all(np.isfinite(weights)):
+            print(f"⚠️  {self.method}方法权重无效（评分数据退化），使用默认权重", file=sys.stderr)
+            weights = np.array([self.DEFAULT_WEIGHTS[dim] for dim in self.DIMENSIONS])
+        
         weights_dict = {dim: float(w) for dim, w in zip(self.DIMENSIONS, weights)}
         return weights_dict
     
     def _critic_weights(self, matrix: np.ndarray) -> np.ndarray:
         try:
+            if NUMBA_AVAILABLE:
+                return _critic_weights_numba(np.ascontiguousarray(matrix, dtype=np.float64))
             weights = mcdm_weights.critic_weights(matrix)
             return weights
         except Exception as e:
@@ -113,11 +190,10 @@ class MCDMAnalyzer:
         return weights
     
     def _calculate_contribution(self, matrix: np.ndarray, weights: Dict[str, float]) -> Dict[str, float]:
-        contribution = {}
-        for dim, weight in zip(self.DIMENSIONS, weights.values()):
-            dim_values = matrix[:, self.DIMENSIONS.index(dim)]
-            cv = np.std(dim_values) / (np.mean(dim_values) + 1e-6)
-            contribution[dim] = float(weight * cv * 100)
+        # 各维度的变异系数按列一次算出
+        weight_vector = np.array([weights[dim] for dim in self.DIMENSIONS], dtype=np.float64)
+        cv = np.std(matrix, axis=0) / (np.mean(matrix, axis=0) + 1e-6)
+        contribution = dict(zip(self.DIMENSIONS, (weight_vector * cv * 100).tolist()))
         
         total = sum(contribution.values())
         if total > 0:
@@ -126,11 +202,9 @@ class MCDMAnalyzer:
         return contribution
     
     def _calculate_total_score(self, matrix: np.ndarray, weights: Dict[str, float]) -> List[float]:
-        total_scores = []
-        for row in matrix:
-            total = sum(row[i] * weights[dim] for i, dim in enumerate(self.DIMENSIONS))
-            total_scores.append(float(total))
-        return total_scores
+        # 每张照片的总分是各维度得分的加权和：一次矩阵-向量乘法
+        weight_vector = np.array([weights[dim] for dim in self.DIMENSIONS], dtype=np.float64)
+        return (matrix @ weight_vector).tolist()
     
     def _generate_analysis(self) -> Dict[str, Any]:
         max_contribution_dim = max(self.contribution.items(), key=lambda x: x[1])[0]
@@ -231,6 +305,13 @@ class MCDMAnalyzer:
         return result
 
 
+def _dumps_pretty(obj: Any) -> str:
+    """序列化为缩进 2 格、保留中文的 JSON 文本（有 orjson 时使用 orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
 def main():
     parser = argparse.ArgumentParser(description='MCDM评分权重优化器')
     parser.add_argument('scores_file', help='评分数据JSON文件')
@@ -244,22 +325,42 @@ def main():
     
     # 尝试多种编码读取文件
     def read_json_file(file_path: str) -> Any:
-        """尝试多种编码读取JSON文件"""
-        encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp936']
+        """读取JSON文件：文件只读一次，先按 UTF-8 解析，不是合法 UTF-8 时再对内存中的字节逐个尝试其他编码"""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except Exception as e:
+            print(f"⚠️  读取文件失败: {e}", file=sys.stderr)
+            raise
+        
+        # 记事本等保存的 UTF-8 文件带 BOM，去掉后按 UTF-8 处理
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # 非 UTF-8 内容，或 orjson 不接受而标准库接受的写法（json.dump 写出的 NaN/Infinity）
+                pass
+        
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError as e:
+            print(f"⚠️  尝试编码 utf-8 失败: {e}", file=sys.stderr)
+        # 内容是合法的 UTF-8 但JSON格式有误时直接抛出：换编码（尤其是 latin-1）只会掩盖问题
+        
+        encodings = ['gbk', 'gb2312', 'latin-1', 'cp936']
         
         for encoding in encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return json.load(f)
+                return json.loads(data.decode(encoding))
             except (UnicodeDecodeError, json.JSONDecodeError) as e:
                 print(f"⚠️  尝试编码 {encoding} 失败: {e}", file=sys.stderr)
                 continue
-            except Exception as e:
-                print(f"⚠️  读取文件失败: {e}", file=sys.stderr)
-                raise
         
         # 所有编码都失败
-        raise Exception(f"无法用任何编码读取文件: {encodings}")
+        raise Exception(f"无法用任何编码读取文件: {['utf-8'] + encodings}")
     
     try:
         scores = read_json_file(args.scores_file)
@@ -278,7 +379,7 @@ def main():
     result = analyzer.analyze_weights(scores)
     
     if args.json:
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(_dumps_pretty(result))
     else:
         print(analyzer.visualize_weights(args.output))
     
@@ -8,6 +8,9 @@
 import sys
 import subprocess
 import json
+import importlib.util
+from importlib import metadata
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 
 
@@ -53,18 +56,14 @@ def check_python_info() -> Dict[str, Any]:
 
 
 def check_package(package_name: str, import_name: str) -> Dict[str, Any]:
-    """检查包是否可用"""
-    try:
-        module = __import__(import_name)
-        version = getattr(module, '__version__', 'unknown')
-        file_path = getattr(module, '__file__', 'unknown')
-        return {
-            'installed': True,
-            'version': version,
-            'file_path': file_path,
-            'import_name': import_name
-        }
-    except ImportError:
+    """
+    检查包是否可用
+
+    只查找模块位置并读取安装元数据（dist-info），不执行包代码；
+    torch 等重型包的导入初始化可能耗时数秒，这里完全避免
+    """
+    spec = importlib.util.find_spec(import_name)
+    if spec is None:
         return {
             'installed': False,
             'version': None,
@@ -72,35 +71,49 @@ def check_package(package_name: str, import_name: str) -> Dict[str, Any]:
             'import_name': import_name
         }
 
+    try:
+        version = metadata.version(package_name)
+    except metadata.PackageNotFoundError:
+        version = 'unknown'
 
-def check_functionalities() -> Dict[str, Any]:
-    """检查各功能模块的可用性"""
-    results = {}
+    return {
+        'installed': True,
+        'version': version,
+        'file_path': spec.origin or 'unknown',
+        'import_name': import_name
+    }
 
-    # 检查 scikit-image
-    skimage_info = check_package('scikit-image', 'skimage')
-    results['scikit_image'] = skimage_info
 
-    # 检查 scikit-learn
-    sklearn_info = check_package('scikit-learn', 'sklearn')
-    results['scikit_learn'] = sklearn_info
+# 需要检查的依赖包：(结果键, 发行包名, 导入名)
+_PACKAGES = (
+    ('scikit_image', 'scikit-image', 'skimage'),
+    ('scikit_learn', 'scikit-learn', 'sklearn'),
+    ('pillow', 'pillow', 'PIL'),
+)
 
-    # 检查 PIL/Pillow
-    pil_info = check_package('pillow', 'PIL')
-    results['pillow'] = pil_info
 
-    return results
+def check_functionalities() -> Dict[str, Any]:
+    """检查各功能模块的可用性（各包相互独立，并发探测）"""
+    with ThreadPoolExecutor(max_workers=len(_PACKAGES)) as executor:
+        futures = {
+            key: executor.submit(check_package, package_name, import_name)
+            for key, package_name, import_name in _PACKAGES
+        }
+        # 按 _PACKAGES 顺序收集，保持输出顺序稳定
+        return {key: future.result() for key, future in futures.items()}
 
 
 def check_color_analyzer() -> Dict[str, Any]:
     """检查颜色分析器是否可用"""
     try:
-        # 检查 scikit-image 是否可用
-        try:
-            from skimage.color import rgb2lab
-            harmonicity_available = True
-        except ImportError:
-            harmonicity_available = False
+        # 检查 scikit-image 是否可用（未安装时不尝试导入）
+        harmonicity_available = False
+        if importlib.util.find_spec('skimage') is not None:
+            try:
+                from skimage.color import rgb2lab
+                harmonicity_available = True
+            except ImportError:
+                pass
 
         return {
             'available': True,
@@ -140,45 +153,45 @@ def generate_summary(checks: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def print_report(checks: Dict[str, Any], status: Dict[str, Any]):
-    """打印环境检查报告"""
-    print("=" * 70, file=sys.stderr)
-    print("🔍 环境检查报告", file=sys.stderr)
-    print("=" * 70, file=sys.stderr)
-    print("", file=sys.stderr)
-
-    # Python 信息
+    """打印环境检查报告（整份报告拼好后一次写入 stderr）"""
     python_info = checks['python']
-    print(f"📋 Python 版本: {python_info['python_version'].split()[0]}", file=sys.stderr)
-    print(f"📍 Python 路径: {python_info['python_executable']}", file=sys.stderr)
-    print("", file=sys.stderr)
-
-    # 依赖包状态
-    print("📦 依赖包状态:", file=sys.stderr)
+    lines = [
+        "=" * 70,
+        "🔍 环境检查报告",
+        "=" * 70,
+        "",
+        # Python 信息
+        f"📋 Python 版本: {python_info['python_version'].split()[0]}",
+        f"📍 Python 路径: {python_info['python_executable']}",
+        "",
+        # 依赖包状态
+        "📦 依赖包状态:",
+    ]
     for key, info in checks['functionalities'].items():
         name = key.replace('_', ' ').title()
         if info['installed']:
             version = info.get('version', 'unknown')
-            print(f"  ✅ {name:20} 版本: {version}", file=sys.stderr)
+            lines.append(f"  ✅ {name:20} 版本: {version}")
         else:
-            print(f"  ❌ {name:20} 未安装", file=sys.stderr)
-    print("", file=sys.stderr)
+            lines.append(f"  ❌ {name:20} 未安装")
+    lines.append("")
 
     # 功能可用性
-    print("🎯 功能可用性:", file=sys.stderr)
+    lines.append("🎯 功能可用性:")
 
     # 颜色分析
     color_available = checks['color']['available']
     harmonicity_available = checks['color'].get('harmonicity_analysis', False)
     if color_available:
-        print(f"  色彩分析:         ✅ 可用", file=sys.stderr)
+        lines.append("  色彩分析:         ✅ 可用")
         if harmonicity_available:
-            print(f"    - 和谐度分析:   ✅ 精确版", file=sys.stderr)
+            lines.append("    - 和谐度分析:   ✅ 精确版")
         else:
-            print(f"    - 和谐度分析:   ⚠️  简化版（需要scikit-image）", file=sys.stderr)
+            lines.append("    - 和谐度分析:   ⚠️  简化版（需要scikit-image）")
     else:
-        print(f"  色彩分析:         ❌ 不可用", file=sys.stderr)
+        lines.append("  色彩分析:         ❌ 不可用")
 
-    print("", file=sys.stderr)
+    lines.append("")
 
     # 整体状态
     overall = status['overall']
@@ -187,16 +200,19 @@ def print_report(checks: Dict[str, Any], status: Dict[str, Any]):
         'degraded': '⚠️  DEGRADED - 部分功能降级，基本可用',
         'critical': '❌ CRITICAL - 关键依赖缺失，核心功能不可用'
     }
-    print(f"📊 整体状态: {status_text[overall]}", file=sys.stderr)
+    lines.append(f"📊 整体状态: {status_text[overall]}")
 
     if status['unavailable_features']:
-        print(f"  不可用功能: {', '.join(status['unavailable_features'])}", file=sys.stderr)
+        lines.append(f"  不可用功能: {', '.join(status['unavailable_features'])}")
 
     if status['degraded_features']:
-        print(f"  降级功能: {', '.join(status['degraded_features'])}", file=sys.stderr)
+        lines.append(f"  降级功能: {', '.join(status['degraded_features'])}")
+
+    lines.append("")
+    lines.append("=" * 70)
 
-    print("", file=sys.stderr)
-    print("=" * 70, file=sys.stderr)
+    sys.stderr.write("\n".join(lines) + "\n")
+    sys.stderr.flush()
 
 
 def main():
@@ -216,11 +232,11 @@ def main():
     status = generate_summary(checks)
     checks['summary'] = status
 
-    # 输出 JSON
-    print(json.dumps(checks, indent=2, ensure_ascii=False))
+    # 输出 JSON；直接写 stdout，不经 print 的逐行刷新
+    sys.stdout.write(json.dumps(checks, indent=2, ensure_ascii=False) + "\n")
 
-    # 打印可读报告
-    print("", file=sys.stderr)
+    # 打印可读报告（前置一个空行）
+    sys.stderr.write("\n")
     print_report(checks, status)
 
 
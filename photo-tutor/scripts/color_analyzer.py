@@ -89,47 +89,63 @@ class ColorAestheticsAnalyzer:
         Returns:
             色彩调色板信息，包含心理学分析
         """
-        dominant_colors = []  # 初始化
         try:
             with Image.open(image_path) as img:
-                # 转换为RGB模式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # 缩小图片以加速分析（256x256 保留更多色彩细节）
-                img_small = img.resize((256, 256), Image.Resampling.LANCZOS)
-                
-                # 提取像素
-                pixels = np.array(img_small).reshape(-1, 3)
-                
-                # 提取主要颜色
-                dominant_colors = self._extract_dominant_colors(pixels, n_colors=5)
-                
-                # 分析色彩和谐度（优化版）
-                harmony = self._analyze_color_harmony_advanced(dominant_colors)
-                
-                # 分析色彩心理学（新增）
-                psychology = self._analyze_color_psychology(dominant_colors)
-                
-                # 评估色彩质量（需要包装成dict）
-                quality = self.assess_color_quality(image_path, dominant_colors)
-                
-                # 计算色彩美学评分（新增）
-                aesthetics_score = self._calculate_aesthetics_score(
-                    harmony, psychology, quality
-                )
-                
-                return {
-                    'dominant_colors': dominant_colors,
-                    'harmony': harmony,
-                    'psychology': psychology,
-                    'quality': quality,
-                    'aesthetics_score': aesthetics_score
-                }
+                return self.analyze_color_palette_image(img)
                 
         except Exception as e:
             raise Exception(f"色彩调色板分析失败: {str(e)}")
     
+    def analyze_color_palette_image(self, img: Image.Image) -> Dict[str, Any]:
+        """
+        分析已打开图像的色彩调色板
+        
+        Args:
+            img: PIL Image 对象（可以是其他分析步骤已解码过的同一对象）
+            
+        Returns:
+            色彩调色板信息，包含心理学分析
+        """
+        dominant_colors = []  # 初始化
+        try:
+            # 转换为RGB模式
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            # 缩小图片以加速分析（256x256 保留更多色彩细节）
+            img_small = img.resize((256, 256), Image.Resampling.LANCZOS)
+            
+            # 提取像素
+            pixels = np.array(img_small).reshape(-1, 3)
+            
+            # 提取主要颜色
+            dominant_colors = self._extract_dominant_colors(pixels, n_colors=5)
+            
+            # 分析色彩和谐度（优化版）
+            harmony = self._analyze_color_harmony_advanced(dominant_colors)
+            
+            # 分析色彩心理学（新增）
+            psychology = self._analyze_color_psychology(dominant_colors)
+            
+            # 评估色彩质量（复用已解码的图像）
+            quality = self._assess_color_quality_image(img, dominant_colors)
+            
+            # 计算色彩美学评分（新增）
+            aesthetics_score = self._calculate_aesthetics_score(
+                harmony, psychology, quality
+            )
+            
+            return {
+                'dominant_colors': dominant_colors,
+                'harmony': harmony,
+                'psychology': psychology,
+                'quality': quality,
+                'aesthetics_score': aesthetics_score
+            }
+            
+        except Exception as e:
+            raise Exception(f"色彩调色板分析失败: {str(e)}")
+    
     def _extract_dominant_colors(self, pixels: np.ndarray, n_colors: int = 5) -> list:
         """
         提取主要颜色（优化版）
@@ -405,25 +421,33 @@ class ColorAestheticsAnalyzer:
         """
         try:
             with Image.open(image_path) as img:
-                # 评估饱和度
-                saturation_score = self._assess_saturation(dominant_colors)
-                
-                # 评估对比度
-                contrast_score = self._assess_contrast(image_path)
-                
-                # 综合评分
-                overall_score = (saturation_score + contrast_score) / 2
-                
-                return {
-                    'saturation_score': saturation_score,
-                    'contrast_score': contrast_score,
-                    'overall_score': overall_score,
-                    'rating': self._get_quality_rating(overall_score)
-                }
+                return self._assess_color_quality_image(img, dominant_colors)
                 
         except Exception as e:
             raise Exception(f"色彩质量评估失败: {str(e)}")
     
+    def _assess_color_quality_image(self, img: Image.Image, dominant_colors: list) -> Dict[str, Any]:
+        """评估色彩质量（基于已打开的图像）"""
+        try:
+            # 评估饱和度
+            saturation_score = self._assess_saturation(dominant_colors)
+            
+            # 评估对比度
+            contrast_score = self._assess_contrast_image(img)
+            
+            # 综合评分
+            overall_score = (saturation_score + contrast_score) / 2
+            
+            return {
+                'saturation_score': saturation_score,
+                'contrast_score': contrast_score,
+                'overall_score': overall_score,
+                'rating': self._get_quality_rating(overall_score)
+            }
+            
+        except Exception as e:
+            raise Exception(f"色彩质量评估失败: {str(e)}")
+    
     def _assess_saturation(self, dominant_colors: list) -> float:
         """
         评估饱和度（优化版）
@@ -483,31 +507,39 @@ class ColorAestheticsAnalyzer:
         """
         try:
             with Image.open(image_path) as img:
-                # 转换为灰度
-                gray = img.convert('L')
-                
-                # 计算标准差（对比度指标）
-                gray_array = np.array(gray)
-                contrast = gray_array.std()
-                
-                # 归一化到0-100
-                contrast_score = min(contrast / 64.0 * 100, 100.0)
-                
-                # 理想对比度为30-50（强化版，降低评分）
-                if 30 <= contrast <= 50:
-                    return 85.0  # 原100 → 85
-                elif 20 <= contrast < 30:
-                    return 70.0  # 原90 → 70
-                elif 50 < contrast <= 70:
-                    return 75.0  # 原85 → 75
-                elif contrast < 20:
-                    return max(contrast / 20 * 100, 40.0)  # 原50 → 40
-                else:  # > 70
-                    return max(85.0 - (contrast - 70) * 1.5, 50.0)  # 原100 → 85, 原70 → 50
+                return self._assess_contrast_image(img)
                 
         except Exception:
             return 50.0
     
+    def _assess_contrast_image(self, img: Image.Image) -> float:
+        """评估对比度（基于已打开的图像）"""
+        try:
+            # 转换为灰度
+            gray = img.convert('L')
+            
+            # 计算标准差（对比度指标）
+            gray_array = np.array(gray)
+            contrast = gray_array.std()
+            
+            # 归一化到0-100
+            contrast_score = min(contrast / 64.0 * 100, 100.0)
+            
+            # 理想对比度为30-50（强化版，降低评分）
+            if 30 <= contrast <= 50:
+                return 85.0  # 原100 → 85
+            elif 20 <= contrast < 30:
+                return 70.0  # 原90 → 70
+            elif 50 < contrast <= 70:
+                return 75.0  # 原85 → 75
+            elif contrast < 20:
+                return max(contrast / 20 * 100, 40.0)  # 原50 → 40
+            else:  # > 70
+                return max(85.0 - (contrast - 70) * 1.5, 50.0)  # 原100 → 85, 原70 → 50
+            
+        except Exception:
+            return 50.0
+    
     def _calculate_aesthetics_score(self, harmony: Dict[str, Any], 
                                      psychology: Dict[str, Any],
                                      quality: Dict[str, Any]) -> float:
@@ -619,12 +651,30 @@ class ColorAestheticsAnalyzer:
         Args:
             image_path: 图片路径
             
+        Returns:
+            综合分析结果
+        """
+        try:
+            with Image.open(image_path) as img:
+                return self.analyze_image(img, image_path)
+                
+        except Exception as e:
+            raise Exception(f"综合分析失败: {str(e)}")
+    
+    def analyze_image(self, img: Image.Image, image_path: str) -> Dict[str, Any]:
+        """
+        对已打开的图像做综合分析
+        
+        Args:
+            img: PIL Image 对象
+            image_path: 图片路径（仅写入报告）
+            
         Returns:
             综合分析结果
         """
         try:
             # 分析调色板
-            palette = self.analyze_color_palette(image_path)
+            palette = self.analyze_color_palette_image(img)
             
             # 生成报告
             report = {
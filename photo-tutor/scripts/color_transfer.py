@@ -6,8 +6,10 @@
 """
 
 import argparse
+import os
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Tuple, Optional
 
@@ -17,6 +19,19 @@ from skimage.color import rgb2lab, lab2rgb
 from scipy.ndimage import gaussian_filter1d
 
 
+@lru_cache(maxsize=4)
+def _load_reference_cached(path: str, mtime_ns: int, size: int) -> Tuple[np.ndarray, dict]:
+    """
+    解码参考图并提取统计信息（按 路径 + 修改时间 + 大小 缓存）
+
+    返回的 LAB 数组设为只读，避免调用方意外修改缓存内容
+    """
+    engine = ColorTransferEngine()
+    ref_lab = rgb2lab(engine._load_image(path))
+    ref_lab.flags.writeable = False
+    return ref_lab, engine._extract_full_stats(ref_lab)
+
+
 class ColorTransferEngine:
     """
     色彩风格迁移引擎
@@ -37,7 +52,9 @@ class ColorTransferEngine:
         target_path: str,
         method: str = 'zone_based',
         strength: float = 1.0,
-        preserve_luminance: bool = False
+        preserve_luminance: bool = False,
+        ref_lab: Optional[np.ndarray] = None,
+        ref_stats: Optional[dict] = None,
     ) -> Dict[str, Any]:
         """
         执行色彩迁移
@@ -48,6 +65,8 @@ class ColorTransferEngine:
             method: 迁移方法 'global_lab' | 'zone_based' | 'histogram' | 'improved'
             strength: 迁移强度 0.0~1.0
             preserve_luminance: 是否保留目标图的亮度通道
+            ref_lab: 预先计算的参考图 LAB（可选，提供时跳过参考图解码）
+            ref_stats: 预先计算的参考图统计信息（可选）
 
         返回:
             {
@@ -62,16 +81,14 @@ class ColorTransferEngine:
 
         start_time = time.time()
 
-        # 加载图像 → float64 RGB [0, 1]
-        ref_rgb = self._load_image(reference_path)
-        tgt_rgb = self._load_image(target_path)
-
-        # RGB → LAB (float64, L: 0~100, A/B: -128~127)
-        ref_lab = rgb2lab(ref_rgb)
-        tgt_lab = rgb2lab(tgt_rgb)
+        # 加载图像 → float64 RGB [0, 1] → LAB (float64, L: 0~100, A/B: -128~127)
+        if ref_lab is None:
+            ref_lab = rgb2lab(self._load_image(reference_path))
+        tgt_lab = rgb2lab(self._load_image(target_path))
 
         # 提取参考图统计信息（全局 + 分区）
-        ref_stats = self._extract_full_stats(ref_lab)
+        if ref_stats is None:
+            ref_stats = self._extract_full_stats(ref_lab)
 
         # 保存原始目标图 LAB（用于 strength 混合和亮度保留）
         tgt_lab_original = tgt_lab.copy()
@@ -110,6 +127,19 @@ class ColorTransferEngine:
 
     # ========== 图像加载 ==========
 
+    def load_reference(self, path: str) -> Tuple[np.ndarray, dict]:
+        """
+        加载参考图 LAB 与统计信息（带缓存）
+
+        同一参考图在迁移、LUT 生成之间重复使用时只解码一次；
+        文件被修改后（mtime/大小变化）自动失效
+
+        返回:
+            (ref_lab, ref_stats)，ref_lab 为只读数组
+        """
+        st = os.stat(path)
+        return _load_reference_cached(path, st.st_mtime_ns, st.st_size)
+
     def _load_image(self, path: str) -> np.ndarray:
         """加载图像，返回 float64 RGB [0, 1]"""
         img = Image.open(path)
@@ -143,12 +173,21 @@ class ColorTransferEngine:
         }
         return stats
 
+    @staticmethod
+    def _to_planar(lab: np.ndarray) -> np.ndarray:
+        """
+        (H, W, 3) 交错存储 → (3, H, W) 连续平面存储
+
+        逐通道统计（均值/标准差/掩码取值）在连续平面上是线性扫描，
+        比在 HWC 的跨步视图上快约一倍
+        """
+        return np.ascontiguousarray(np.moveaxis(lab, -1, 0))
+
     def _extract_global_stats(self, lab: np.ndarray) -> dict:
         """提取全局 LAB 统计（均值、标准差）"""
         return {
-            'L': {'mean': float(lab[:, :, 0].mean()), 'std': float(lab[:, :, 0].std())},
-            'A': {'mean': float(lab[:, :, 1].mean()), 'std': float(lab[:, :, 1].std())},
-            'B': {'mean': float(lab[:, :, 2].mean()), 'std': float(lab[:, :, 2].std())},
+            ch_name: {'mean': float(plane.mean()), 'std': float(plane.std())}
+            for ch_name, plane in zip('LAB', self._to_planar(lab))
         }
 
     def _extract_zone_stats(
@@ -163,7 +202,8 @@ class ColorTransferEngine:
         """
         if shadow_max is None or highlight_min is None:
             shadow_max, highlight_min = self._compute_zone_boundaries(lab)
-        L = lab[:, :, 0]
+        planes = self._to_planar(lab)
+        L = planes[0]
         zones = {}
         zone_defs = {
             'shadows': (0, shadow_max),
@@ -176,18 +216,16 @@ class ColorTransferEngine:
             if pixel_count < 10:
                 # 该区间像素太少，用全局值兜底
                 zones[zone_name] = {
-                    'L': {'mean': float(L.mean()), 'std': float(L.std())},
-                    'A': {'mean': float(lab[:, :, 1].mean()), 'std': float(lab[:, :, 1].std())},
-                    'B': {'mean': float(lab[:, :, 2].mean()), 'std': float(lab[:, :, 2].std())},
-                    'pixel_ratio': 0.0,
+                    ch_name: {'mean': float(plane.mean()), 'std': float(plane.std())}
+                    for ch_name, plane in zip('LAB', planes)
                 }
+                zones[zone_name]['pixel_ratio'] = 0.0
             else:
                 zones[zone_name] = {
-                    'L': {'mean': float(lab[:, :, 0][mask].mean()), 'std': float(lab[:, :, 0][mask].std())},
-                    'A': {'mean': float(lab[:, :, 1][mask].mean()), 'std': float(lab[:, :, 1][mask].std())},
-                    'B': {'mean': float(lab[:, :, 2][mask].mean()), 'std': float(lab[:, :, 2][mask].std())},
-                    'pixel_ratio': float(pixel_count / L.size),
+                    ch_name: {'mean': float(values.mean()), 'std': float(values.std())}
+                    for ch_name, values in zip('LAB', (plane[mask] for plane in planes))
                 }
+                zones[zone_name]['pixel_ratio'] = float(pixel_count / L.size)
         return zones
 
     def _extract_histograms(self, lab: np.ndarray, bins: int = 512) -> dict:
@@ -7,7 +7,13 @@
 import os
 import sys
 import json
+import asyncio
 import base64
+import io
+import mmap
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
@@ -18,16 +24,153 @@ try:
 except ImportError:
     pass  # 如果没有安装 python-dotenv，从系统环境变量读取
 
+# Coze 环境下使用预置代理与 CA 的 requests 包装（其代理配置可能在导入时才注入，不能只凭环境变量判断）；
+# 包装已安装但未配置代理/CA 时，创建会话会抛 ValueError，届时退回普通 requests 会话（见 _get_session）
 try:
     from coze_workload_identity import requests
 except ImportError:
     import requests
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image, ImageOps
+
+# 可选依赖：SIMD 加速的 base64 编码（多 MB 的 JPEG 编码更快）
+try:
+    import pybase64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+
+# 可选依赖：批量分析时用同一个异步连接池并发请求 API
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# 可选依赖：命令行 --json 输出（带缩进时标准库 json 走纯 Python 编码器）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 序列化请求体时图片 URL 的占位符（序列化后再替换为 base64 数据）
+_IMAGE_URL_PLACEHOLDER = "__PHOTO_TUTOR_IMAGE_URL__"
+_IMAGE_URL_PLACEHOLDER_JSON = f'"{_IMAGE_URL_PLACEHOLDER}"'.encode('ascii')
+
+# 小于该大小的图片直接 read，更大的用 mmap 映射（映射本身有固定开销）
+_MMAP_MIN_SIZE = 64 * 1024
+
+# 基础情感分析字典（无API时使用）：模块级只读表，不随每个实例重复构造
+_EMOTION_KEYWORDS = MappingProxyType({
+    'joy': ('happy', 'bright', 'cheerful', 'uplifting', 'joyful'),
+    'sadness': ('melancholic', 'somber', 'gloomy', 'nostalgic', 'sad'),
+    'excitement': ('energetic', 'dynamic', 'thrilling', 'exciting'),
+    'calm': ('peaceful', 'serene', 'tranquil', 'calm', 'quiet'),
+    'mystery': ('mysterious', 'enigmatic', 'intriguing', 'secretive'),
+    'romance': ('romantic', 'tender', 'affectionate', 'intimate'),
+    'loneliness': ('lonely', 'isolated', 'solitary', 'alone'),
+    'hope': ('hopeful', 'optimistic', 'promising', 'inspiring'),
+    'nostalgia': ('nostalgic', 'sentimental', 'reminiscent'),
+    'anger': ('intense', 'dramatic', 'powerful', 'bold')
+})
+
+_COLOR_EMOTION_MAP = MappingProxyType({
+    'red': ('passion', 'energy', 'warmth', 'excitement'),
+    'orange': ('joy', 'warmth', 'friendliness', 'enthusiasm'),
+    'yellow': ('happiness', 'optimism', 'energy', 'cheerfulness'),
+    'green': ('calm', 'peace', 'nature', 'growth'),
+    'blue': ('calm', 'serenity', 'cold', 'sadness'),
+    'purple': ('mystery', 'royalty', 'romance', 'creativity'),
+    'pink': ('romance', 'tenderness', 'sweetness'),
+    'brown': ('warmth', 'earthiness', 'comfort'),
+    'black': ('mystery', 'elegance', 'power', 'sadness'),
+    'white': ('purity', 'peace', 'cleanliness', 'simplicity')
+})
+
+
+# 摄影师人设的系统提示词（按输出语言）
+_PHOTOGRAPHER_PROMPTS = {
+    'zh': """你是一位经验丰富、富有洞察力的摄影师，拥有20年的摄影经验，擅长情感表达和叙事性摄影。
+
+你的摄影理念：
+- 技术服务于情感，情感是照片的灵魂
+- 好照片不仅是技术的体现，更是情感的载体
+- 摄影是用镜头与世界对话的方式
+
+你的分析风格：
+1. 温暖而专业：用真诚、共情的语言，让读者感受到你的专业与温度
+2. 深入而具体：不只是说"很好"，而是解释为什么好，哪里好
+3. 建设性建议：批评要温和，建议要具体，让人愿意接受
+4. 情感共鸣：关注照片传达的情绪，以及它如何打动人心
+5. 个人化表达：用第一人称"我"来表达感受，增加亲切感
+
+分析维度：
+- 情感表达：照片传达了什么情绪？是否打动人心？
+- 故事性：照片背后有什么故事？是否能引发联想？
+- 情感元素：哪些元素（色彩、光影、构图、细节）强化了情感？
+- 技术与情感：技术手段如何服务于情感表达？
+- 情感共鸣：照片如何触动观众的内心？
+
+回答格式：
+1. 以第一人称"我"开始，表达你的直观感受
+2. 用温暖、富有感染力的语言描述照片
+3. 指出照片最打动人心的地方
+4. 如果有改进空间，用温和、鼓励的方式提出建议
+5. 最后用一句温暖的话结束，鼓励摄影师继续创作
+
+现在，请分析这张照片的情感表达。""",
+    'en': """You are an experienced and insightful photographer with 20 years of experience, specializing in emotional expression and narrative photography.
+
+Your photography philosophy:
+- Technique serves emotion; emotion is the soul of a photo
+- A good photo is not just a technical achievement, but an emotional carrier
+- Photography is a way to dialogue with the world through the lens
+
+Your analysis style:
+1. Warm and professional: Use sincere, empathetic language to convey your expertise and warmth
+2. In-depth and specific: Don't just say "good," explain why and where it's good
+3. Constructive feedback: Criticize gently, suggest specifically, make it acceptable
+4. Emotional resonance: Focus on the emotions conveyed and how they touch hearts
+5. Personal expression: Use first person "I" to express feelings, adding intimacy
+
+Analysis dimensions:
+- Emotional expression: What emotions does the photo convey? Is it touching?
+- Storytelling: What story lies behind? Does it trigger associations?
+- Emotional elements: Which elements (color, light, composition, details) enhance emotion?
+- Technique and emotion: How do technical means serve emotional expression?
+- Emotional resonance: How does the photo touch the viewer's heart?
+
+Response format:
+1. Start with first person "I", expressing your immediate impression
+2. Describe the photo with warm, infectious language
+3. Point out what's most touching about the photo
+4. If there's room for improvement, suggest gently and encouragingly
+5. End with a warm sentence, encouraging the photographer to continue creating
+
+Now, please analyze the emotional expression of this photo.""",
+}
+
+# 系统提示词预先序列化为 JSON 字符串字节，构建请求体时直接拼入，不再每次逐字符转义整段中文
+_SYSTEM_PROMPT_PLACEHOLDER = "__PHOTO_TUTOR_SYSTEM_PROMPT__"
+_SYSTEM_PROMPT_PLACEHOLDER_JSON = f'"{_SYSTEM_PROMPT_PLACEHOLDER}"'.encode('ascii')
+_PHOTOGRAPHER_PROMPTS_JSON = {
+    lang: json.dumps(text, ensure_ascii=False).encode('utf-8')
+    for lang, text in _PHOTOGRAPHER_PROMPTS.items()
+}
 
 
 class EmotionAnalyzer:
     """情感分析器（InternLM API增强版）"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "internvl3.5-241b-a28b", lang: str = "zh"):
+    # 批量分析时同时在途的 API 请求数上限（避免触发限流）
+    MAX_API_CONCURRENCY = 8
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "internvl3.5-241b-a28b", lang: str = "zh",
+                 max_image_edge: Optional[int] = 1344):
         """
         初始化分析器
         
@@ -35,9 +178,11 @@ class EmotionAnalyzer:
             api_key: InternLM API密钥（可选，如不提供则从环境变量读取）
             model: 使用的模型名称，默认使用internvl3.5（多模态模型）
             lang: 输出语言，'zh' 或 'en'
+            max_image_edge: 上传给 API 的图片长边上限（像素），None 表示上传原图
         """
         self.api_key = api_key or os.getenv("INTERNLM_API_KEY")
         self.model = model
+        self.max_image_edge = max_image_edge
         self.base_url = "https://chat.intern-ai.org.cn/api/v1"
         self.skill_id = "7599838351486795795"
         self.lang = lang  # 添加语言设置
@@ -48,32 +193,13 @@ class EmotionAnalyzer:
         
         self.use_api = bool(self.api_key)
         
-        # 基础情感分析字典（无API时使用）
-        self.emotion_keywords = {
-            'joy': ['happy', 'bright', 'cheerful', 'uplifting', 'joyful'],
-            'sadness': ['melancholic', 'somber', 'gloomy', 'nostalgic', 'sad'],
-            'excitement': ['energetic', 'dynamic', 'thrilling', 'exciting'],
-            'calm': ['peaceful', 'serene', 'tranquil', 'calm', 'quiet'],
-            'mystery': ['mysterious', 'enigmatic', 'intriguing', 'secretive'],
-            'romance': ['romantic', 'tender', 'affectionate', 'intimate'],
-            'loneliness': ['lonely', 'isolated', 'solitary', 'alone'],
-            'hope': ['hopeful', 'optimistic', 'promising', 'inspiring'],
-            'nostalgia': ['nostalgic', 'sentimental', 'reminiscent'],
-            'anger': ['intense', 'dramatic', 'powerful', 'bold']
-        }
+        # 同步请求共享的 HTTP 会话，首次请求时创建（见 _get_session）
+        self._session = None
+        self._session_lock = threading.Lock()
         
-        self.color_emotion_map = {
-            'red': ['passion', 'energy', 'warmth', 'excitement'],
-            'orange': ['joy', 'warmth', 'friendliness', 'enthusiasm'],
-            'yellow': ['happiness', 'optimism', 'energy', 'cheerfulness'],
-            'green': ['calm', 'peace', 'nature', 'growth'],
-            'blue': ['calm', 'serenity', 'cold', 'sadness'],
-            'purple': ['mystery', 'royalty', 'romance', 'creativity'],
-            'pink': ['romance', 'tenderness', 'sweetness'],
-            'brown': ['warmth', 'earthiness', 'comfort'],
-            'black': ['mystery', 'elegance', 'power', 'sadness'],
-            'white': ['purity', 'peace', 'cleanliness', 'simplicity']
-        }
+        # 基础情感分析字典（无API时使用），所有实例共享模块级只读表
+        self.emotion_keywords = _EMOTION_KEYWORDS
+        self.color_emotion_map = _COLOR_EMOTION_MAP
     
     def encode_image_base64(self, image_path: str) -> str:
         """
@@ -85,31 +211,143 @@ class EmotionAnalyzer:
         Returns:
             base64编码的字符串
         """
+        with self._read_image_file(image_path) as data:
+            return self._b64encode(data).decode('ascii')
+    
+    @staticmethod
+    def _b64encode(data: bytes) -> bytes:
+        """base64 编码（有 pybase64 时使用 SIMD 加速版本；接受任何支持缓冲区协议的对象）"""
+        return (pybase64 if PYBASE64_AVAILABLE else base64).b64encode(data)
+    
+    @staticmethod
+    @contextmanager
+    def _read_image_file(image_path: str):
+        """
+        读取图片文件内容（仅在 with 块内有效）
+        
+        大文件用只读 mmap 直接映射页缓存交给编码器，不再先整块复制成 bytes；
+        小文件映射的开销不划算，直接 read
+        """
         with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+            if os.fstat(image_file.fileno()).st_size < _MMAP_MIN_SIZE:
+                yield image_file.read()
+                return
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
     
-    def call_internlm_api(self, image_path: str, 
-                          prompt: str,
-                          context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    @contextmanager
+    def _upload_image_buffer(self, image_path: str):
         """
-        调用InternLM ChatAPI进行多模态分析
+        要上传给 API 的图片内容（仅在 with 块内有效）
         
-        Args:
-            image_path: 图片路径
-            prompt: 提示词
-            context: 上下文信息（可选）
+        InternVL 视觉编码器按 448² 切块处理，几千万像素的原图只会增加上传与服务端解码开销；
+        长边超过 max_image_edge（或不是 RGB/灰度 JPEG）时缩小并重新编码为 JPEG，已足够小的 JPEG 原样上传
+        """
+        with self._read_image_file(image_path) as data:
+            buffer = None
+            if self.max_image_edge:
+                try:
+                    buffer = self._resize_for_upload(data)
+                except Exception:
+                    # 无法解码时原样上传，由 API 返回具体错误
+                    buffer = None
             
-        Returns:
-            API响应结果
+            if buffer is None:
+                yield data
+            else:
+                # 直接引用 BytesIO 的内部缓冲区，不再 getvalue() 复制一份
+                with buffer.getbuffer() as view:
+                    yield view
+    
+    def _resize_for_upload(self, data) -> Optional[io.BytesIO]:
+        """按 max_image_edge 缩小并重新编码为 JPEG；无需处理时返回 None"""
+        edge = self.max_image_edge
+        source = data if isinstance(data, mmap.mmap) else io.BytesIO(data)
+        with Image.open(source) as img:
+            if img.format == 'JPEG' and img.mode in ('RGB', 'L') and max(img.size) <= edge:
+                return None
+            # JPEG 按 1/2~1/8 比例解码，缩小前就少处理大部分像素
+            img.draft('RGB', (edge, edge))
+            # 重新编码会丢弃 EXIF，先按方向标记把像素转正
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            img.convert('RGB').save(buffer, 'JPEG', quality=85)
+            return buffer
+    
+    def _get_session(self) -> "requests.Session":
         """
-        if not self.api_key:
-            raise ValueError("未设置API Key，请设置环境变量 INTERNLM_API_KEY")
+        同步请求共享的 HTTP 会话
         
-        # 构建请求
-        image_base64 = self.encode_image_base64(image_path)
+        keep-alive 复用连接，连续分析时省去每次请求的 TCP/TLS 握手；
+        连接失败和 502/503（请求未被处理）时自动重试两次。
+        requests.session() 在 coze_workload_identity 下返回已配置代理与 CA 的会话，
+        包装未配置代理/CA 时退回普通 requests 会话
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    try:
+                        session = requests.session()
+                    except ValueError as e:
+                        print(f"⚠️  coze_workload_identity 未配置代理/CA，使用普通 requests 会话: {e}",
+                              file=sys.stderr)
+                        session = Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=2,
+                        pool_maxsize=8,
+                        max_retries=Retry(
+                            total=2, read=0, backoff_factor=0.3,
+                            status_forcelist=(502, 503),
+                            allowed_methods=frozenset({"POST"}),
+                            raise_on_status=False
+                        )
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self._api_headers())
+                    self._session = session
+        return self._session
+    
+    def _api_headers(self) -> Dict[str, str]:
+        """API 请求头"""
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+    
+    @staticmethod
+    def _extract_content(result: Dict[str, Any]) -> str:
+        """提取回复内容，content 为空时尝试 reasoning_content"""
+        message = result.get("choices", [{}])[0].get("message", {})
+        return message.get("content", "") or message.get("reasoning_content", "")
+    
+    def _build_api_body(self, image_path: str, prompt: str,
+                        context: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        构建多模态分析的请求体（已序列化的 JSON 字节串，含 base64 图片）
         
+        图片 URL 先用占位符序列化，再把 base64 字节直接拼进 JSON：
+        数 MB 的 base64 不经过 str 解码、f-string 拼接和 json 编码这几次整块复制；
+        系统提示词同样用占位符序列化，再换成预先序列化好的字节
+        """
+        payload = self._build_api_payload(_IMAGE_URL_PLACEHOLDER, prompt, context,
+                                          system_prompt=_SYSTEM_PROMPT_PLACEHOLDER)
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head, tail = body.split(_IMAGE_URL_PLACEHOLDER_JSON, 1)
+        head = head.replace(_SYSTEM_PROMPT_PLACEHOLDER_JSON,
+                            _PHOTOGRAPHER_PROMPTS_JSON['en' if self.lang == 'en' else 'zh'], 1)
+        with self._upload_image_buffer(image_path) as data:
+            image_b64 = self._b64encode(data)
+        return b''.join((head, b'"data:image/jpeg;base64,', image_b64, b'"', tail))
+    
+    def _build_api_payload(self, image_url: str, prompt: str,
+                           context: Optional[Dict[str, Any]] = None,
+                           system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """构建多模态分析的请求体（image_url 为图片的 data URL 或占位符，system_prompt 默认为摄影师人设）"""
         # 构建完整的系统提示
-        system_prompt = self._get_photographer_prompt()
+        if system_prompt is None:
+            system_prompt = self._get_photographer_prompt()
         
         # 构建用户消息
         user_message = {
@@ -118,7 +356,7 @@ class EmotionAnalyzer:
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}"
+                        "url": image_url
                     }
                 },
                 {
@@ -130,18 +368,11 @@ class EmotionAnalyzer:
         
         # 添加上下文信息
         if context:
-            context_text = "\n\n参考信息：\n"
-            for key, value in context.items():
-                context_text += f"- {key}: {value}\n"
-            user_message["content"][1]["text"] += context_text
-        
-        # 构建完整请求
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+            user_message["content"][1]["text"] += "\n\n参考信息：\n" + "".join(
+                f"- {key}: {value}\n" for key, value in context.items()
+            )
         
-        payload = {
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -150,36 +381,51 @@ class EmotionAnalyzer:
             "temperature": 0.8,
             "max_tokens": 1500
         }
+    
+    def _parse_api_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """解析 chat/completions 响应"""
+        content = self._extract_content(result)
+        if not content:
+            return {
+                "success": False,
+                "error": "API返回空内容"
+            }
+        
+        return {
+            "success": True,
+            "content": content,
+            "model": result.get("model", self.model),
+            "usage": result.get("usage", {})
+        }
+    
+    def call_internlm_api(self, image_path: str, 
+                          prompt: str,
+                          context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        调用InternLM ChatAPI进行多模态分析
+        
+        Args:
+            image_path: 图片路径
+            prompt: 提示词
+            context: 上下文信息（可选）
+            
+        Returns:
+            API响应结果
+        """
+        if not self.api_key:
+            raise ValueError("未设置API Key，请设置环境变量 INTERNLM_API_KEY")
+        
+        body = self._build_api_body(image_path, prompt, context)
         
         try:
-            response = requests.post(
+            response = self._get_session().post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
+                data=body,
                 timeout=60
             )
             response.raise_for_status()
             
-            result = response.json()
-            
-            # 提取内容，处理可能的空内容
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-            if not content:
-                # 如果content为空，尝试获取reasoning_content
-                content = result.get("choices", [{}])[0].get("message", {}).get("reasoning_content", "")
-            
-            if not content:
-                return {
-                    "success": False,
-                    "error": "API返回空内容"
-                }
-            
-            return {
-                "success": True,
-                "content": content,
-                "model": result.get("model", self.model),
-                "usage": result.get("usage", {})
-            }
+            return self._parse_api_response(response.json())
             
         except requests.exceptions.RequestException as e:
             return {
@@ -197,90 +443,67 @@ class EmotionAnalyzer:
                 "error": f"未知错误: {str(e)}"
             }
     
-    def _get_photographer_prompt(self) -> str:
+    async def call_internlm_api_async(self, client: "httpx.AsyncClient",
+                                      image_path: str,
+                                      prompt: str,
+                                      context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        获取摄影师人设的提示词
+        call_internlm_api 的异步版本
         
+        Args:
+            client: 调用方共享的 httpx.AsyncClient（多张照片复用同一连接池）
+            image_path: 图片路径
+            prompt: 提示词
+            context: 上下文信息（可选）
+            
         Returns:
-            系统提示词
+            API响应结果
         """
-        if self.lang == 'en':
-            prompt = """You are an experienced and insightful photographer with 20 years of experience, specializing in emotional expression and narrative photography.
-
-Your photography philosophy:
-- Technique serves emotion; emotion is the soul of a photo
-- A good photo is not just a technical achievement, but an emotional carrier
-- Photography is a way to dialogue with the world through the lens
-
-Your analysis style:
-1. Warm and professional: Use sincere, empathetic language to convey your expertise and warmth
-2. In-depth and specific: Don't just say "good," explain why and where it's good
-3. Constructive feedback: Criticize gently, suggest specifically, make it acceptable
-4. Emotional resonance: Focus on the emotions conveyed and how they touch hearts
-5. Personal expression: Use first person "I" to express feelings, adding intimacy
-
-Analysis dimensions:
-- Emotional expression: What emotions does the photo convey? Is it touching?
-- Storytelling: What story lies behind? Does it trigger associations?
-- Emotional elements: Which elements (color, light, composition, details) enhance emotion?
-- Technique and emotion: How do technical means serve emotional expression?
-- Emotional resonance: How does the photo touch the viewer's heart?
-
-Response format:
-1. Start with first person "I", expressing your immediate impression
-2. Describe the photo with warm, infectious language
-3. Point out what's most touching about the photo
-4. If there's room for improvement, suggest gently and encouragingly
-5. End with a warm sentence, encouraging the photographer to continue creating
-
-Now, please analyze the emotional expression of this photo."""
-        else:
-            prompt = """你是一位经验丰富、富有洞察力的摄影师，拥有20年的摄影经验，擅长情感表达和叙事性摄影。
-
-你的摄影理念：
-- 技术服务于情感，情感是照片的灵魂
-- 好照片不仅是技术的体现，更是情感的载体
-- 摄影是用镜头与世界对话的方式
-
-你的分析风格：
-1. 温暖而专业：用真诚、共情的语言，让读者感受到你的专业与温度
-2. 深入而具体：不只是说"很好"，而是解释为什么好，哪里好
-3. 建设性建议：批评要温和，建议要具体，让人愿意接受
-4. 情感共鸣：关注照片传达的情绪，以及它如何打动人心
-5. 个人化表达：用第一人称"我"来表达感受，增加亲切感
-
-分析维度：
-- 情感表达：照片传达了什么情绪？是否打动人心？
-- 故事性：照片背后有什么故事？是否能引发联想？
-- 情感元素：哪些元素（色彩、光影、构图、细节）强化了情感？
-- 技术与情感：技术手段如何服务于情感表达？
-- 情感共鸣：照片如何触动观众的内心？
-
-回答格式：
-1. 以第一人称"我"开始，表达你的直观感受
-2. 用温暖、富有感染力的语言描述照片
-3. 指出照片最打动人心的地方
-4. 如果有改进空间，用温和、鼓励的方式提出建议
-5. 最后用一句温暖的话结束，鼓励摄影师继续创作
-
-现在，请分析这张照片的情感表达。"""
+        if not self.api_key:
+            raise ValueError("未设置API Key，请设置环境变量 INTERNLM_API_KEY")
+        
+        # 读图与 base64 编码放到线程中，不阻塞事件循环
+        body = await asyncio.to_thread(self._build_api_body, image_path, prompt, context)
         
-        return prompt
+        try:
+            response = await client.post(
+                f"{self.base_url}/chat/completions",
+                headers=self._api_headers(),
+                content=body,
+                timeout=60
+            )
+            response.raise_for_status()
+            
+            return self._parse_api_response(response.json())
+            
+        except httpx.HTTPError as e:
+            return {
+                "success": False,
+                "error": f"网络请求错误: {str(e)}"
+            }
+        except (KeyError, IndexError) as e:
+            return {
+                "success": False,
+                "error": f"响应解析错误: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"未知错误: {str(e)}"
+            }
     
-    def analyze_emotion_with_api(self, image_path: str, 
-                                 photo_info: Optional[Dict[str, Any]] = None,
-                                 color_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _get_photographer_prompt(self) -> str:
         """
-        使用InternLM API进行情感分析
+        获取摄影师人设的提示词
         
-        Args:
-            image_path: 图片路径
-            photo_info: 照片信息（可选）
-            color_analysis: 颜色分析结果（可选）
-            
         Returns:
-            情感分析结果
+            系统提示词
         """
+        return _PHOTOGRAPHER_PROMPTS['en' if self.lang == 'en' else 'zh']
+    
+    def _build_emotion_prompt(self, photo_info: Optional[Dict[str, Any]] = None,
+                              color_analysis: Optional[Dict[str, Any]] = None):
+        """构建情感分析的提示词与上下文"""
         # 构建提示词
         prompt = """请从情感和故事的角度分析这张照片。重点关注：
 
@@ -304,9 +527,10 @@ Now, please analyze the emotional expression of this photo."""
             context["色彩情感"] = ', '.join(emotion.get('keywords', []))
             context["色调"] = emotion.get('temperature', 'balanced')
         
-        # 调用API
-        api_result = self.call_internlm_api(image_path, prompt, context)
-        
+        return prompt, context
+    
+    def _api_failure(self, api_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """API 调用失败时的情感分析结果"""
         # 确保api_result不为None
         if not api_result:
             return {
@@ -314,46 +538,87 @@ Now, please analyze the emotional expression of this photo."""
                 "error": "API调用返回空结果"
             }
         
-        if api_result.get("success"):
-            analysis_text = api_result["content"]
-            
-            # 如果是英文模式，翻译结果
-            if self.lang == 'en' and analysis_text:
-                print("  🌐 正在翻译为英文...")
-                translated_text = self._translate_to_english(analysis_text)
-                if translated_text:
-                    analysis_text = translated_text
-                    print("  ✅ 翻译完成")
-                else:
-                    print("  ⚠️  翻译失败，保留中文结果")
-            
-            return {
-                "method": "internlm_api",
-                "model": api_result["model"],
-                "analysis": analysis_text,
-                "usage": api_result.get("usage", {}),
-                "success": True
-            }
-        else:
-            return {
-                "method": "internlm_api",
-                "error": api_result.get("error", "未知错误"),
-                "success": False
-            }
+        return {
+            "method": "internlm_api",
+            "error": api_result.get("error", "未知错误"),
+            "success": False
+        }
     
-    def _translate_to_english(self, chinese_text: str) -> Optional[str]:
+    def _api_success(self, api_result: Dict[str, Any], analysis_text: str,
+                     translated_text: Optional[str] = None) -> Dict[str, Any]:
+        """API 调用成功时的情感分析结果（英文模式下传入翻译结果）"""
+        if self.lang == 'en' and analysis_text:
+            if translated_text:
+                analysis_text = translated_text
+                print("  ✅ 翻译完成")
+            else:
+                print("  ⚠️  翻译失败，保留中文结果")
+        
+        return {
+            "method": "internlm_api",
+            "model": api_result["model"],
+            "analysis": analysis_text,
+            "usage": api_result.get("usage", {}),
+            "success": True
+        }
+    
+    def analyze_emotion_with_api(self, image_path: str, 
+                                 photo_info: Optional[Dict[str, Any]] = None,
+                                 color_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        将中文文本翻译成英文
+        使用InternLM API进行情感分析
         
         Args:
-            chinese_text: 中文文本
+            image_path: 图片路径
+            photo_info: 照片信息（可选）
+            color_analysis: 颜色分析结果（可选）
             
         Returns:
-            英文翻译结果，失败返回None
+            情感分析结果
         """
-        try:
-            # 使用InternLM API进行翻译
-            translation_prompt = f"""Please translate the following Chinese photography analysis into English. 
+        prompt, context = self._build_emotion_prompt(photo_info, color_analysis)
+        
+        # 调用API
+        api_result = self.call_internlm_api(image_path, prompt, context)
+        if not api_result or not api_result.get("success"):
+            return self._api_failure(api_result)
+        
+        analysis_text = api_result["content"]
+        translated_text = None
+        
+        # 如果是英文模式，翻译结果
+        if self.lang == 'en' and analysis_text:
+            print("  🌐 正在翻译为英文...")
+            translated_text = self._translate_to_english(analysis_text)
+        
+        return self._api_success(api_result, analysis_text, translated_text)
+    
+    async def analyze_emotion_with_api_async(self, client: "httpx.AsyncClient",
+                                             image_path: str,
+                                             photo_info: Optional[Dict[str, Any]] = None,
+                                             color_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """analyze_emotion_with_api 的异步版本，请求走调用方共享的 client"""
+        prompt, context = self._build_emotion_prompt(photo_info, color_analysis)
+        
+        # 调用API
+        api_result = await self.call_internlm_api_async(client, image_path, prompt, context)
+        if not api_result or not api_result.get("success"):
+            return self._api_failure(api_result)
+        
+        analysis_text = api_result["content"]
+        translated_text = None
+        
+        # 如果是英文模式，翻译结果
+        if self.lang == 'en' and analysis_text:
+            print("  🌐 正在翻译为英文...")
+            translated_text = await self._translate_to_english_async(client, analysis_text)
+        
+        return self._api_success(api_result, analysis_text, translated_text)
+    
+    def _build_translation_payload(self, chinese_text: str) -> Dict[str, Any]:
+        """构建中译英请求体"""
+        # 使用InternLM API进行翻译
+        translation_prompt = f"""Please translate the following Chinese photography analysis into English. 
 Keep the emotional tone, professional terminology, and poetic language style.
 Maintain the same structure and formatting (including **bold** markers and line breaks).
 
@@ -361,42 +626,68 @@ Chinese text:
 {chinese_text}
 
 English translation:"""
+        
+        # 构建翻译请求
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a professional translator specializing in photography and art critique. Translate Chinese to English while preserving emotional depth and technical accuracy."
+            },
+            {
+                "role": "user",
+                "content": translation_prompt
+            }
+        ]
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
+    
+    def _translate_to_english(self, chinese_text: str) -> Optional[str]:
+        """
+        将中文文本翻译成英文
+        
+        Args:
+            chinese_text: 中文文本
             
-            # 构建翻译请求
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a professional translator specializing in photography and art critique. Translate Chinese to English while preserving emotional depth and technical accuracy."
-                },
-                {
-                    "role": "user",
-                    "content": translation_prompt
-                }
-            ]
-            
+        Returns:
+            英文翻译结果，失败返回None
+        """
+        try:
             # 调用API
-            response = requests.post(
+            response = self._get_session().post(
                 f"{self.base_url}/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                },
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 2000
-                },
+                json=self._build_translation_payload(chinese_text),
                 timeout=30
             )
             
             if response.status_code == 200:
-                result = response.json()
-                content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-                if not content:
-                    content = result.get("choices", [{}])[0].get("message", {}).get("reasoning_content", "")
-                
+                content = self._extract_content(response.json())
+                if content:
+                    return content.strip()
+            
+            return None
+            
+        except Exception as e:
+            print(f"    翻译错误: {str(e)}")
+            return None
+    
+    async def _translate_to_english_async(self, client: "httpx.AsyncClient",
+                                          chinese_text: str) -> Optional[str]:
+        """_translate_to_english 的异步版本"""
+        try:
+            response = await client.post(
+                f"{self.base_url}/chat/completions",
+                headers=self._api_headers(),
+                json=self._build_translation_payload(chinese_text),
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                content = self._extract_content(response.json())
                 if content:
                     return content.strip()
             
@@ -422,26 +713,22 @@ English translation:"""
         """
         emotion_scores = {}
         
-        # 分析主要颜色的情感
+        # 分析主要颜色的情感（最多 3 种颜色，逐个标量判断即可，无需向量化）
         if color_palette:
-            dominant_colors = color_palette.get('dominant_colors', [])
-            for color_info in dominant_colors[:3]:
-                r, g, b = color_info['r'], color_info['g'], color_info['b']
+            color_emotion_map = self.color_emotion_map
+            for color_info in color_palette.get('dominant_colors', [])[:3]:
+                primary_color = self._get_primary_color(color_info['r'], color_info['g'], color_info['b'])
                 percentage = color_info['percentage']
-                
-                primary_color = self._get_primary_color(r, g, b)
-                emotions = self.color_emotion_map.get(primary_color, [])
-                
-                for emotion in emotions:
-                    if emotion not in emotion_scores:
-                        emotion_scores[emotion] = 0
-                    emotion_scores[emotion] += percentage
+                for emotion in color_emotion_map.get(primary_color, ()):
+                    emotion_scores[emotion] = emotion_scores.get(emotion, 0) + percentage
         
         # 归一化并排序
         if emotion_scores:
             total = sum(emotion_scores.values())
-            for emotion in emotion_scores:
-                emotion_scores[emotion] = round((emotion_scores[emotion] / total) * 100, 1)
+            emotion_scores = {
+                emotion: round((score / total) * 100, 1)
+                for emotion, score in emotion_scores.items()
+            }
         
         sorted_emotions = sorted(emotion_scores.items(), key=lambda x: x[1], reverse=True)
         
@@ -494,6 +781,37 @@ English translation:"""
             else:
                 return 'blue'
     
+    def _new_result(self, image_path: Optional[str]) -> Dict[str, Any]:
+        """综合分析结果的公共字段"""
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "image_path": image_path,
+            "api_available": self.use_api,
+            "model": self.model
+        }
+    
+    def _finish_api_analysis(self, result: Dict[str, Any], api_result: Dict[str, Any],
+                             color_analysis: Optional[Dict[str, Any]],
+                             scene_type: Optional[str],
+                             composition_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """写入 API 分析结果，失败时退回基础情感分析"""
+        result["emotion_analysis"] = api_result
+        
+        if api_result.get("success"):
+            result["status"] = "success"
+        else:
+            print(f"⚠️ API调用失败: {api_result.get('error')}")
+            print("📝 使用基础情感分析作为fallback...")
+            basic_result = self.analyze_emotion_basic(
+                color_analysis,
+                scene_type,
+                composition_info
+            )
+            result["emotion_analysis"] = basic_result
+            result["status"] = "fallback"
+        
+        return result
+    
     def analyze(self, image_path: Optional[str] = None,
                 photo_info: Optional[Dict[str, Any]] = None,
                 color_analysis: Optional[Dict[str, Any]] = None,
@@ -514,12 +832,7 @@ English translation:"""
         Returns:
             情感分析结果
         """
-        result = {
-            "timestamp": datetime.now().isoformat(),
-            "image_path": image_path,
-            "api_available": self.use_api,
-            "model": self.model
-        }
+        result = self._new_result(image_path)
         
         # 如果可以使用API且不强制基础模式
         if self.use_api and not force_basic and image_path:
@@ -529,31 +842,94 @@ English translation:"""
                 photo_info,
                 color_analysis
             )
-            result["emotion_analysis"] = api_result
+            return self._finish_api_analysis(result, api_result, color_analysis, scene_type, composition_info)
+        
+        # 使用基础分析
+        print("📝 使用基础情感分析（如需更专业的分析，请配置InternLM API Key）")
+        basic_result = self.analyze_emotion_basic(
+            color_analysis,
+            scene_type,
+            composition_info
+        )
+        result["emotion_analysis"] = basic_result
+        result["status"] = "basic"
+        
+        return result
+    
+    async def analyze_async(self, client: "httpx.AsyncClient",
+                            image_path: Optional[str] = None,
+                            photo_info: Optional[Dict[str, Any]] = None,
+                            color_analysis: Optional[Dict[str, Any]] = None,
+                            scene_type: Optional[str] = None,
+                            composition_info: Optional[Dict[str, Any]] = None,
+                            force_basic: bool = False) -> Dict[str, Any]:
+        """
+        综合情感分析的异步版本
+        
+        多张照片并发分析时由调用方创建一个 httpx.AsyncClient 并传入，
+        所有请求共享其连接池；参数与返回值同 analyze
+        """
+        if not (self.use_api and not force_basic and image_path):
+            # 基础分析是纯本地计算，直接走同步版本
+            return self.analyze(image_path, photo_info, color_analysis,
+                                scene_type, composition_info, force_basic)
+        
+        result = self._new_result(image_path)
+        print("📸 正在使用InternLM API进行专业摄影师视角的情感分析...")
+        api_result = await self.analyze_emotion_with_api_async(
+            client,
+            image_path,
+            photo_info,
+            color_analysis
+        )
+        return self._finish_api_analysis(result, api_result, color_analysis, scene_type, composition_info)
+    
+    async def analyze_many(self, image_paths: List[str], max_concurrency: int = MAX_API_CONCURRENCY,
+                           force_basic: bool = False) -> List[Dict[str, Any]]:
+        """
+        并发分析多张照片，结果顺序与输入一致
+        
+        所有请求共享一个 httpx.AsyncClient，信号量限制同时在途的 API 请求数（避免触发限流），
+        N 张照片的总耗时约为 ⌈N/max_concurrency⌉ 次往返；单张照片出错不影响其余照片。
+        未安装 httpx 时逐张同步分析
+        
+        Args:
+            image_paths: 照片文件路径列表
+            max_concurrency: 最大并发请求数
+            force_basic: 强制使用基础分析（不调用API）
             
-            if api_result.get("success"):
-                result["status"] = "success"
-            else:
-                print(f"⚠️ API调用失败: {api_result.get('error')}")
-                print("📝 使用基础情感分析作为fallback...")
-                basic_result = self.analyze_emotion_basic(
-                    color_analysis,
-                    scene_type,
-                    composition_info
-                )
-                result["emotion_analysis"] = basic_result
-                result["status"] = "fallback"
-        else:
-            # 使用基础分析
-            print("📝 使用基础情感分析（如需更专业的分析，请配置InternLM API Key）")
-            basic_result = self.analyze_emotion_basic(
-                color_analysis,
-                scene_type,
-                composition_info
-            )
-            result["emotion_analysis"] = basic_result
-            result["status"] = "basic"
+        Returns:
+            每张照片的情感分析结果
+        """
+        if not HTTPX_AVAILABLE:
+            return [self._analyze_one_safely(path, force_basic) for path in image_paths]
         
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze_one(client: "httpx.AsyncClient", image_path: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.analyze_async(client, image_path=image_path,
+                                                    force_basic=force_basic)
+                except Exception as e:
+                    return self._error_result(image_path, e)
+        
+        limits = httpx.Limits(max_connections=max_concurrency)
+        async with httpx.AsyncClient(limits=limits) as client:
+            return await asyncio.gather(*(analyze_one(client, path) for path in image_paths))
+    
+    def _analyze_one_safely(self, image_path: str, force_basic: bool) -> Dict[str, Any]:
+        """analyze 的批量版本单元：出错时返回错误结果而不是抛出"""
+        try:
+            return self.analyze(image_path=image_path, force_basic=force_basic)
+        except Exception as e:
+            return self._error_result(image_path, e)
+    
+    def _error_result(self, image_path: str, error: Exception) -> Dict[str, Any]:
+        """批量分析中单张照片失败时的结果"""
+        result = self._new_result(image_path)
+        result["status"] = "error"
+        result["emotion_analysis"] = {"success": False, "error": str(error)}
         return result
     
     def print_analysis(self, result: Dict[str, Any]):
@@ -603,6 +979,13 @@ English translation:"""
         print("=" * 70)
 
 
+def _dumps_pretty(obj: Any) -> str:
+    """序列化为缩进 2 格、保留中文的 JSON 文本（有 orjson 时使用 orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
 def main():
     """
     主函数：命令行接口
@@ -610,24 +993,49 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='情感分析工具（支持InternLM API）')
-    parser.add_argument('image_path', help='照片文件路径')
+    parser.add_argument('image_path', nargs='?', help='照片文件路径')
+    parser.add_argument('--batch', metavar='DIR', help='并发分析目录下的全部 JPEG 照片')
+    parser.add_argument('--concurrency', type=int, default=EmotionAnalyzer.MAX_API_CONCURRENCY,
+                       help='批量分析时的最大并发请求数（默认: 8）')
     parser.add_argument('--json', action='store_true', help='输出JSON格式')
     parser.add_argument('--api-key', help='InternLM API密钥（或设置环境变量INTERNLM_API_KEY）')
     parser.add_argument('--model', default='internvl3.5-241b-a28b', 
                        help='使用的模型（默认: internvl3.5-241b-a28b）')
     parser.add_argument('--basic', action='store_true', help='强制使用基础分析（不调用API）')
+    parser.add_argument('--no-resize', action='store_true',
+                       help='上传原图（默认长边缩小到 1344 像素以减少上传量）')
     
     args = parser.parse_args()
+    if not args.image_path and not args.batch:
+        parser.error('需要提供照片文件路径或 --batch 目录')
     
     try:
-        analyzer = EmotionAnalyzer(api_key=args.api_key, model=args.model)
+        analyzer = EmotionAnalyzer(api_key=args.api_key, model=args.model,
+                                   max_image_edge=None if args.no_resize else 1344)
+        
+        if args.batch:
+            image_paths = sorted(
+                os.path.join(args.batch, name) for name in os.listdir(args.batch)
+                if name.lower().endswith(('.jpg', '.jpeg'))
+            )
+            results = asyncio.run(analyzer.analyze_many(
+                image_paths, max_concurrency=args.concurrency, force_basic=args.basic
+            ))
+            if args.json:
+                print(_dumps_pretty(results))
+            else:
+                for result in results:
+                    print(f"\n📷 {os.path.basename(result['image_path'])}")
+                    analyzer.print_analysis(result)
+            return
+        
         result = analyzer.analyze(
             image_path=args.image_path,
             force_basic=args.basic
         )
         
         if args.json:
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+            print(_dumps_pretty(result))
         else:
             analyzer.print_analysis(result)
             
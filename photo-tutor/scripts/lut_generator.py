@@ -8,6 +8,7 @@
 import argparse
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -18,6 +19,141 @@ from skimage.color import rgb2lab, lab2rgb
 
 from color_transfer import ColorTransferEngine
 
+# Numba 为可选依赖：可用时 apply_lut 的三线性插值走 JIT 内核
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    from numba import types as _nbt
+
+    def _c_arrays(dtype, ndim):
+        """可写与只读两种 C 连续数组类型（np.asarray(PIL 图像)、lru_cache 缓存的数组都是只读的）"""
+        return (_nbt.Array(dtype, ndim, 'C'), _nbt.Array(dtype, ndim, 'C', readonly=True))
+
+    _U1_IMAGE = _c_arrays(_nbt.uint8, 3)
+    _F4_LUT = _c_arrays(_nbt.float32, 4)
+    _F8_LUT = _c_arrays(_nbt.float64, 4)
+
+    # 固定类型签名：导入时即编译（cache=True 时直接读取磁盘缓存），首次调用无编译延迟
+    @numba.njit([_nbt.void(image, lut, _U1_IMAGE[0], _nbt.int64)
+                 for image in _U1_IMAGE for lut in _F4_LUT],
+                parallel=True, fastmath=True, cache=True)
+    def _apply_lut_numba(image, lut, out, n):
+        """
+        逐像素三线性插值（按行并行）
+
+        参数:
+            image: (H, W, 3) uint8
+            lut: (n, n, n, 3) float32, [0, 1]
+            out: (H, W, 3) uint8，结果写入此数组
+            n: LUT 每轴条目数
+        """
+        h = image.shape[0]
+        w = image.shape[1]
+        scale = (n - 1) / 255.0
+        for y in numba.prange(h):
+            for x in range(w):
+                fr = image[y, x, 0] * scale
+                fg = image[y, x, 1] * scale
+                fb = image[y, x, 2] * scale
+                r0 = min(int(fr), n - 2)
+                g0 = min(int(fg), n - 2)
+                b0 = min(int(fb), n - 2)
+                dr = fr - r0
+                dg = fg - g0
+                db = fb - b0
+                for c in range(3):
+                    c00 = lut[r0, g0, b0, c] * (1.0 - dr) + lut[r0 + 1, g0, b0, c] * dr
+                    c10 = lut[r0, g0 + 1, b0, c] * (1.0 - dr) + lut[r0 + 1, g0 + 1, b0, c] * dr
+                    c01 = lut[r0, g0, b0 + 1, c] * (1.0 - dr) + lut[r0 + 1, g0, b0 + 1, c] * dr
+                    c11 = lut[r0, g0 + 1, b0 + 1, c] * (1.0 - dr) + lut[r0 + 1, g0 + 1, b0 + 1, c] * dr
+                    c0 = c00 * (1.0 - dg) + c10 * dg
+                    c1 = c01 * (1.0 - dg) + c11 * dg
+                    v = (c0 * (1.0 - db) + c1 * db) * 255.0
+                    if v < 0.0:
+                        v = 0.0
+                    elif v > 255.0:
+                        v = 255.0
+                    out[y, x, c] = np.uint8(v)
+
+    @numba.njit([_nbt.UniTuple(_nbt.float64, 5)(lut) for lut in _F8_LUT], fastmath=True, cache=True)
+    def _diff_stats_numba(lut):
+        """
+        单次遍历计算 LUT 与 identity 的偏差统计，不分配差值数组
+
+        返回:
+            (平均绝对偏差, 最大绝对偏差, R 平均偏移, G 平均偏移, B 平均偏移)
+        """
+        n = lut.shape[0]
+        step = 1.0 / (n - 1) if n > 1 else 0.0
+        abs_sum = 0.0
+        abs_max = 0.0
+        r_sum = 0.0
+        g_sum = 0.0
+        b_sum = 0.0
+        for i in range(n):
+            for j in range(n):
+                for k in range(n):
+                    dr = lut[i, j, k, 0] - i * step
+                    dg = lut[i, j, k, 1] - j * step
+                    db = lut[i, j, k, 2] - k * step
+                    r_sum += dr
+                    g_sum += dg
+                    b_sum += db
+                    ar = abs(dr)
+                    ag = abs(dg)
+                    ab = abs(db)
+                    abs_sum += ar + ag + ab
+                    abs_max = max(abs_max, ar, ag, ab)
+        count = n * n * n
+        return abs_sum / (count * 3), abs_max, r_sum / count, g_sum / count, b_sum / count
+
+
+def warmup_kernels():
+    """
+    在小尺寸输入上运行一次 Numba 内核
+
+    编译已在导入时完成，这里主要是提前启动并行线程池，
+    避免用户的第一次 Hald 请求承担这部分开销。未安装 Numba 时为空操作
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    lut = np.zeros((4, 4, 4, 3), dtype=np.float32)
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    _apply_lut_numba(image, lut, np.empty_like(image), 4)
+    _diff_stats_numba(lut.astype(np.float64))
+
+
+@lru_cache(maxsize=4)
+def _hald_identity_array(level: int) -> np.ndarray:
+    """
+    生成 identity Hald CLUT 像素数组（只依赖 level，按 level 缓存）
+
+    返回只读数组 shape (level³, level³, 3), uint8
+    """
+    N = level * level          # LUT 每轴条目数
+    img_size = level ** 3      # 图片宽高
+    total_pixels = img_size * img_size  # = N³
+
+    indices = np.arange(total_pixels)
+    r_idx = indices % N
+    g_idx = (indices // N) % N
+    b_idx = indices // (N * N)
+
+    # 索引 → uint8 颜色值: [0, N-1] → [0, 255]
+    scale = 255.0 / (N - 1)
+    r = (r_idx * scale).round().astype(np.uint8)
+    g = (g_idx * scale).round().astype(np.uint8)
+    b = (b_idx * scale).round().astype(np.uint8)
+
+    image_array = np.stack([r, g, b], axis=-1).reshape(img_size, img_size, 3)
+    image_array.flags.writeable = False
+    return image_array
+
 
 class LUTGenerator:
     """
@@ -38,7 +174,8 @@ class LUTGenerator:
         reference_path: str,
         method: str = 'zone_based',
         strength: float = 1.0,
-        engine: Optional[ColorTransferEngine] = None
+        engine: Optional[ColorTransferEngine] = None,
+        ref_lab: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         通过色彩迁移生成 3D LUT
@@ -53,6 +190,7 @@ class LUTGenerator:
             method: 迁移方法
             strength: 迁移强度
             engine: 迁移引擎实例（可复用）
+            ref_lab: 预先计算的参考图 LAB（可选，提供时跳过参考图解码）
 
         返回:
             np.ndarray, shape (size, size, size, 3), float [0, 1]
@@ -64,15 +202,12 @@ class LUTGenerator:
         identity_image = self._create_identity_image()
 
         # 加载参考图 → LAB
-        ref_rgb = engine._load_image(reference_path)
-        ref_lab = rgb2lab(ref_rgb)
+        if ref_lab is None:
+            ref_lab = rgb2lab(engine._load_image(reference_path))
 
         # identity 图像 → LAB
         identity_lab = rgb2lab(identity_image)
 
-        # 提取参考图统计信息
-        ref_stats = engine._extract_full_stats(ref_lab)
-
         # 根据方法应用迁移到 identity lattice
         if method == 'global_lab':
             result_lab = engine._transfer_global_lab(ref_lab, identity_lab)
@@ -149,11 +284,9 @@ class LUTGenerator:
             f.write('\n')
 
             # 按 .cube 标准顺序输出: B(外层) → G(中层) → R(内层)
-            for bi in range(s):
-                for gi in range(s):
-                    for ri in range(s):
-                        r, g, b = lut_data[ri, gi, bi]
-                        f.write(f'{r:.6f} {g:.6f} {b:.6f}\n')
+            # (R, G, B, 3) 转置为 (B, G, R, 3) 后展平，整表一次格式化写出
+            table = lut_data.transpose(2, 1, 0, 3).reshape(-1, 3)
+            np.savetxt(f, table, fmt='%.6f')
 
         print(f"LUT 已导出: {output_path} ({s}x{s}x{s})")
 
@@ -216,12 +349,19 @@ class LUTGenerator:
             image: RGB 图像, shape (H, W, 3), uint8 [0, 255] 或 float [0, 1]
             lut_data: LUT 数据, shape (size, size, size, 3), float [0, 1]
             interpolation: 插值方法 'linear' 或 'cubic'（默认 cubic，渐变更平滑）
+                           uint8 输入 + 'linear' 且安装了 Numba 时使用 JIT 三线性内核
 
         返回:
             np.ndarray, shape (H, W, 3), uint8 [0, 255]
         """
         s = lut_data.shape[0]
 
+        if NUMBA_AVAILABLE and interpolation == 'linear' and image.dtype == np.uint8 and s >= 2:
+            image = np.ascontiguousarray(image)
+            out = np.empty_like(image)
+            _apply_lut_numba(image, np.ascontiguousarray(lut_data, dtype=np.float32), out, int(s))
+            return out
+
         # 归一化输入到 [0, 1]
         if image.dtype == np.uint8:
             img_float = image.astype(np.float64) / 255.0
@@ -263,6 +403,39 @@ class LUTGenerator:
         results = np.clip(results * 255.0, 0, 255).astype(np.uint8)
         return results
 
+    @staticmethod
+    def diff_from_identity(lut_data: np.ndarray) -> Tuple[float, float, float, float, float]:
+        """
+        统计 LUT 相对 identity 映射的偏差（[0, 1] 尺度）
+
+        参数:
+            lut_data: shape (N, N, N, 3), float [0, 1]
+
+        返回:
+            (avg_shift, max_shift, r_shift, g_shift, b_shift)
+            前两项为绝对偏差的均值/最大值，后三项为各通道的平均有符号偏移
+        """
+        N = lut_data.shape[0]
+
+        if NUMBA_AVAILABLE:
+            return tuple(float(v) for v in _diff_stats_numba(np.ascontiguousarray(lut_data, dtype=np.float64)))
+
+        # identity 只依赖各自轴的坐标，用广播代替 meshgrid，避免分配 N³x3 的 identity 数组
+        grid = np.linspace(0, 1, N).astype(lut_data.dtype)
+        r_diff = lut_data[:, :, :, 0] - grid[:, None, None]
+        g_diff = lut_data[:, :, :, 1] - grid[None, :, None]
+        b_diff = lut_data[:, :, :, 2] - grid[None, None, :]
+
+        r_shift = float(r_diff.mean())
+        g_shift = float(g_diff.mean())
+        b_shift = float(b_diff.mean())
+
+        abs_diff = [np.abs(d, out=d) for d in (r_diff, g_diff, b_diff)]
+        avg_shift = float(np.add(np.add(abs_diff[0], abs_diff[1]), abs_diff[2]).mean() / 3)
+        max_shift = float(np.maximum(np.maximum(abs_diff[0], abs_diff[1]), abs_diff[2]).max())
+
+        return avg_shift, max_shift, r_shift, g_shift, b_shift
+
     # ========== Hald CLUT ==========
 
     def generate_hald_identity(self, level: int = 8) -> Image.Image:
@@ -282,24 +455,7 @@ class LUTGenerator:
         if level not in (8, 12):
             raise ValueError(f"仅支持 level 8 或 12，收到: {level}")
 
-        N = level * level          # LUT 每轴条目数
-        img_size = level ** 3      # 图片宽高
-        total_pixels = img_size * img_size  # = N³
-
-        indices = np.arange(total_pixels)
-        r_idx = indices % N
-        g_idx = (indices // N) % N
-        b_idx = indices // (N * N)
-
-        # 索引 → uint8 颜色值: [0, N-1] → [0, 255]
-        scale = 255.0 / (N - 1)
-        r = (r_idx * scale).round().astype(np.uint8)
-        g = (g_idx * scale).round().astype(np.uint8)
-        b = (b_idx * scale).round().astype(np.uint8)
-
-        pixels = np.stack([r, g, b], axis=-1)
-        image_array = pixels.reshape(img_size, img_size, 3)
-        return Image.fromarray(image_array, 'RGB')
+        return Image.fromarray(_hald_identity_array(level), 'RGB')
 
     def hald_to_lut(self, processed_hald: Image.Image) -> np.ndarray:
         """
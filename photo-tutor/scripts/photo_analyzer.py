@@ -10,12 +10,14 @@ from datetime import datetime
 from PIL import Image, ExifTags, ImageStat
 
 
-def extract_basic_info(image_path):
+def extract_basic_info(image_path, fast=False):
     """
     提取照片基础信息
     
     Args:
         image_path: 照片文件路径
+        fast: 快速模式。尺寸与EXIF只读文件头，亮度/对比度在
+              JPEG 缩小解码（约 512px）的图像上计算，适合批量分析
         
     Returns:
         dict: 包含照片基础信息的字典
@@ -25,34 +27,74 @@ def extract_basic_info(image_path):
     
     try:
         with Image.open(image_path) as img:
-            info = {
-                'file_name': os.path.basename(image_path),
-                'file_size': os.path.getsize(image_path),
-                'format': img.format,
-                'mode': img.mode,
-                'width': img.width,
-                'height': img.height,
-                'aspect_ratio': round(img.width / img.height, 2),
-                'resolution': f"{img.width}x{img.height}",
-                'is_portrait': img.height > img.width,
-                'is_landscape': img.width > img.height,
-                'is_square': img.width == img.height
-            }
-            
-            # 提取EXIF信息
-            exif_info = extract_exif(img)
-            info.update(exif_info)
-            
-            # 提取色彩信息
-            color_info = extract_color_info(img)
-            info.update(color_info)
-            
-            return info
+            return extract_basic_info_from_image(img, image_path, fast=fast)
             
     except Exception as e:
         raise Exception(f"处理图片失败: {str(e)}")
 
 
+def extract_basic_info_from_image(img, image_path, fast=False, img_rgb=None):
+    """
+    从已打开的 PIL Image 提取基础信息
+    
+    尺寸与EXIF只读文件头，像素在计算色彩统计时才解码；调用方可以
+    在同一个 img 上继续做色彩分析，整张照片只解码一次。
+    
+    Args:
+        img: 由 Image.open 打开且尚未 load 的 PIL Image 对象
+        image_path: 照片文件路径（用于文件名与文件大小）
+        fast: 快速模式，含义同 extract_basic_info
+        img_rgb: 调用方已转换好的 RGB 图像（可选），色彩统计直接复用；
+            draft 会立即改变 img.size，因此调用方只能在读取文件头之后才设置
+            draft 并转换——需要 draft 时请改为先调用 extract_header_info，
+            再对转换后的图像调用 extract_color_info
+        
+    Returns:
+        dict: 包含照片基础信息的字典
+    """
+    info = extract_header_info(img, image_path)
+    
+    # 提取色彩信息（快速模式下让 libjpeg 按 1/2~1/8 比例解码；须在读取尺寸之后设置）
+    if fast and img_rgb is None:
+        img.draft('RGB', (512, 512))
+    color_info = extract_color_info(img if img_rgb is None else img_rgb)
+    info.update(color_info)
+    
+    return info
+
+
+def extract_header_info(img, image_path):
+    """
+    提取文件头中的尺寸、格式与EXIF信息（不解码像素）
+    
+    Args:
+        img: 由 Image.open 打开且尚未设置 draft 的 PIL Image 对象
+        image_path: 照片文件路径（用于文件名与文件大小）
+        
+    Returns:
+        dict: 基础信息字典（不含色彩统计）
+    """
+    info = {
+        'file_name': os.path.basename(image_path),
+        'file_size': os.path.getsize(image_path),
+        'format': img.format,
+        'mode': img.mode,
+        'width': img.width,
+        'height': img.height,
+        'aspect_ratio': round(img.width / img.height, 2),
+        'resolution': f"{img.width}x{img.height}",
+        'is_portrait': img.height > img.width,
+        'is_landscape': img.width > img.height,
+        'is_square': img.width == img.height
+    }
+    
+    # 提取EXIF信息
+    exif_info = extract_exif(img)
+    info.update(exif_info)
+    
+    return info
+
+
 def extract_exif(img):
     """
     提取EXIF元数据
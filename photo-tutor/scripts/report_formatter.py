@@ -4,11 +4,23 @@
 功能：将智能体生成的分析内容格式化为标准报告
 """
 
+import io
 import json
 import sys
+from statistics import fmean
 from datetime import datetime
 from typing import Dict, Any, List
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 建议优先级的排序与标记（to_markdown 每次调用都会用到，不在循环里重复构造）
+_PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+_PRIORITY_EMOJI = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
 
 class PhotoAnalysisReport:
     """照片分析报告类"""
@@ -42,10 +54,11 @@ class PhotoAnalysisReport:
         设置评分
         
         Args:
-            scores: 评分字典，如 {'composition': 85, 'lighting': 75}
+            scores: 评分字典，如 {'composition': 85, 'lighting': 75}（不会被修改）
         """
-        self.scores = scores
-        self.scores['overall'] = round(sum(scores.values()) / len(scores), 1)
+        # 浅拷贝后再写入 overall，避免修改调用方持有的字典（批量生成报告时可能共享同一份评分）
+        self.scores = dict(scores)
+        self.scores['overall'] = round(fmean(scores.values()), 1)
     
     def add_suggestion(self, priority: str, suggestion: str):
         """
@@ -92,81 +105,81 @@ class PhotoAnalysisReport:
         Returns:
             Markdown格式的报告
         """
-        md = []
+        buf = io.StringIO()
+        w = buf.write
         
         # 标题
-        md.append("# 📷 摄影学习分析报告\n")
-        md.append(f"**生成时间**: {self.created_at}\n")
+        w(f"# 📷 摄影学习分析报告\n\n**生成时间**: {self.created_at}\n\n")
         
         # 照片信息
         if self.photo_info:
-            md.append("## 📸 照片信息")
-            md.append(f"- **文件名**: {self.photo_info.get('file_name', 'N/A')}")
-            md.append(f"- **分辨率**: {self.photo_info.get('resolution', 'N/A')}")
-            md.append(f"- **格式**: {self.photo_info.get('format', 'N/A')}")
+            info = self.photo_info
+            w("## 📸 照片信息\n"
+              f"- **文件名**: {info.get('file_name', 'N/A')}\n"
+              f"- **分辨率**: {info.get('resolution', 'N/A')}\n"
+              f"- **格式**: {info.get('format', 'N/A')}\n")
             
-            if 'aperture' in self.photo_info:
-                md.append(f"- **光圈**: {self.photo_info['aperture']}")
-            if 'shutter_speed' in self.photo_info:
-                md.append(f"- **快门**: {self.photo_info['shutter_speed']}")
-            if 'iso' in self.photo_info:
-                md.append(f"- **ISO**: {self.photo_info['iso']}")
+            if 'aperture' in info:
+                w(f"- **光圈**: {info['aperture']}\n")
+            if 'shutter_speed' in info:
+                w(f"- **快门**: {info['shutter_speed']}\n")
+            if 'iso' in info:
+                w(f"- **ISO**: {info['iso']}\n")
             
-            md.append("")
+            w("\n")
         
         # 评分
         if self.scores:
-            md.append("## 📊 评分")
+            w("## 📊 评分\n")
             for category, score in self.scores.items():
                 emoji = "⭐" * int(score / 20)
-                md.append(f"- **{category.upper()}**: {score}/100 {emoji}")
-            md.append("")
+                w(f"- **{category.upper()}**: {score}/100 {emoji}\n")
+            w("\n")
         
         # 分析
         if self.analysis:
-            md.append("## 🔍 详细分析")
+            w("## 🔍 详细分析\n")
             for category, content in self.analysis.items():
-                md.append(f"### {category.capitalize()}")
-                md.append(content)
-                md.append("")
+                w(f"### {category.capitalize()}\n")
+                w(content)
+                w("\n\n")
         
         # 建议
         if self.suggestions:
-            md.append("## 💡 改进建议")
-            priority_order = {'high': 0, 'medium': 1, 'low': 2}
-            sorted_suggestions = sorted(self.suggestions, key=lambda x: priority_order.get(x['priority'], 3))
+            w("## 💡 改进建议\n")
+            sorted_suggestions = sorted(
+                self.suggestions, key=lambda x: _PRIORITY_ORDER.get(x['priority'], 3)
+            )
             
             for s in sorted_suggestions:
-                emoji = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(s['priority'], '⚪')
-                md.append(f"{emoji} **[{s['priority'].upper()}]** {s['content']}")
-            md.append("")
+                emoji = _PRIORITY_EMOJI.get(s['priority'], '⚪')
+                w(f"{emoji} **[{s['priority'].upper()}]** {s['content']}\n")
+            w("\n")
         
         # 练习方案
         if self.practice_plan:
-            md.append("## 📋 定制化练习方案")
+            w("## 📋 定制化练习方案\n")
             
             if 'goals' in self.practice_plan:
-                md.append("### 学习目标")
+                w("### 学习目标\n")
                 for i, goal in enumerate(self.practice_plan['goals'], 1):
-                    md.append(f"{i}. {goal}")
-                md.append("")
+                    w(f"{i}. {goal}\n")
+                w("\n")
             
             if 'tasks' in self.practice_plan:
-                md.append("### 练习任务")
+                w("### 练习任务\n")
                 for i, task in enumerate(self.practice_plan['tasks'], 1):
                     task_desc = task.get('description', '未描述')
                     task_duration = task.get('duration', '待定')
                     task_criteria = task.get('criteria', '待定义')
-                    md.append(f"**任务{i}**: {task_desc}")
-                    md.append(f"- 建议时长: {task_duration}")
-                    md.append(f"- 完成标准: {task_criteria}")
-                    md.append("")
+                    w(f"**任务{i}**: {task_desc}\n"
+                      f"- 建议时长: {task_duration}\n"
+                      f"- 完成标准: {task_criteria}\n\n")
         
         # 结语
-        md.append("---")
-        md.append("\n*本报告由智能摄影学习助手生成，仅供参考。持续练习是摄影进步的关键！*")
+        w("---\n\n*本报告由智能摄影学习助手生成，仅供参考。持续练习是摄影进步的关键！*")
         
-        return "\n".join(md)
+        return buf.getvalue()
     
     def to_json(self) -> str:
         """
@@ -175,7 +188,16 @@ class PhotoAnalysisReport:
         Returns:
             JSON格式的报告
         """
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        report = self.to_dict()
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.dumps(
+                    report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ).decode('utf-8')
+            except TypeError:
+                # photo_info 里可能混入 orjson 不支持的 EXIF 值类型，交给标准库处理
+                pass
+        return json.dumps(report, ensure_ascii=False, indent=2)
     
     def save_to_file(self, filepath: str, format: str = 'markdown'):
         """
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+照片分析工作进程
+进程池中执行的 CPU 密集分析（基础信息 + 色彩美学）及进程级分析器注册表
+
+单独成模块，工作进程只需导入分析脚本，不加载 Web 界面相关依赖
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from PIL import Image
+
+# 添加脚本路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'photo-tutor/scripts'))
+
+from photo_analyzer import extract_header_info, extract_color_info
+from color_analyzer import ColorAestheticsAnalyzer
+
+
+# 进程级复用的色彩分析器（按 model_path 区分），工作进程处理多个任务时不再重复构造
+_color_analyzers: Dict[Optional[str], ColorAestheticsAnalyzer] = {}
+
+
+def get_color_analyzer(model_path: Optional[str] = None) -> ColorAestheticsAnalyzer:
+    """获取当前进程内共享的 ColorAestheticsAnalyzer 实例"""
+    analyzer = _color_analyzers.get(model_path)
+    if analyzer is None:
+        analyzer = _color_analyzers[model_path] = ColorAestheticsAnalyzer(model_path=model_path)
+    return analyzer
+
+
+@dataclass
+class AnalysisContext:
+    """
+    单张照片的共享分析上下文
+
+    整条流水线只打开一次文件，RGB 转换也只做一次：基础信息的色彩统计和
+    色彩美学分析拿到的是同一个 RGB 图像（非 RGB 源不再各自整图转换一遍）
+    """
+    path: str
+    image: Image.Image
+    fast: bool = False
+    _rgb: Optional[Image.Image] = field(default=None, repr=False)
+
+    @classmethod
+    @contextmanager
+    def open(cls, path: str, fast: bool = False):
+        """打开照片；fast 时在首次取 rgb 时设置 JPEG draft（按 1/2~1/8 比例解码）"""
+        with Image.open(path) as img:
+            yield cls(path, img, fast)
+
+    @property
+    def rgb(self) -> Image.Image:
+        """
+        RGB 模式的图像（首次访问时解码/转换，之后复用）
+
+        draft 会立即把 image.size 改成缩小后的尺寸，所以推迟到这里才设置：
+        调用方须在访问 rgb 之前读取尺寸与EXIF
+        """
+        if self._rgb is None:
+            if self.fast:
+                self.image.draft('RGB', (512, 512))
+            self._rgb = self.image if self.image.mode == 'RGB' else self.image.convert('RGB')
+        return self._rgb
+
+
+def init_worker(config: Dict[str, Any]):
+    """进程池初始化：每个工作进程启动时预先构造分析器，首个任务无需再初始化"""
+    get_color_analyzer(config.get("color_model_path"))
+    try:
+        # 主色提取首次调用时才导入 sklearn（冷启动约 1s），提前到进程启动阶段
+        import sklearn.cluster  # noqa: F401
+    except ImportError:
+        pass
+
+
+def error_result(image_path: str, error: str, batch_ts: Optional[str] = None) -> Dict[str, Any]:
+    """构造分析失败的结果（与 analyze_task 返回结构一致）"""
+    return {
+        "image_path": image_path,
+        "image_name": os.path.basename(image_path),
+        "timestamp": batch_ts or datetime.now().isoformat(),
+        "status": "error",
+        "error": error
+    }
+
+
+def analyze_task(
+    image_path: str, config: Optional[Dict[str, Any]] = None, batch_ts: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    单张照片的 CPU 密集分析（基础信息 + 色彩美学），供进程池调用
+
+    必须是模块级函数以便 pickle；情感分析是网络请求，不在此处执行。
+    batch_ts 为批次统一时间戳，不传时记录本张照片的分析时间
+    """
+    # 前置检查：文件不存在时直接返回，不进入解码
+    if not os.path.isfile(image_path):
+        return error_result(image_path, f"图片文件不存在: {image_path}", batch_ts)
+
+    config = config or {}
+    result = {
+        "image_path": image_path,
+        "image_name": os.path.basename(image_path),
+        "timestamp": batch_ts or datetime.now().isoformat()
+    }
+
+    try:
+        # 只打开/解码一次：先读文件头中的尺寸与EXIF，再解码并转为 RGB，由两个分析步骤共享
+        with AnalysisContext.open(image_path, fast=config.get("fast_basic_info", False)) as ctx:
+            basic_info = extract_header_info(ctx.image, image_path)
+            basic_info.update(extract_color_info(ctx.rgb))
+            result["basic_info"] = basic_info
+            color_analyzer = get_color_analyzer(config.get("color_model_path"))
+            result["color_analysis"] = color_analyzer.analyze_image(ctx.rgb, image_path)
+        result["status"] = "success"
+    except Exception as e:
+        # 各分析器统一把内部错误包装成 Exception 抛出，这里是单张照片唯一的错误处理点
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    return result